@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Benchmark - latency, index cost and ranking regression check for core.py
+Usage: python benchmark.py                      (check rankings against golden set + report)
+       python benchmark.py --update-golden      (accept current rankings as the golden set)
+       python benchmark.py --backend all        (also cross-check the sparse backend)
+       python benchmark.py --cli                (also time cold `search.py` processes)
+
+Exit code 1 when any top-k ranking differs from benchmark_golden.json.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import core
+
+GOLDEN_FILE = Path(__file__).parent / "benchmark_golden.json"
+TOP_K = 5
+REPEAT = 20
+
+# ============ FIXED QUERY SET ============
+DOMAIN_QUERIES = {
+    "style": ["glassmorphism dark mode", "minimal clean corporate", "brutalism bold", "playful colorful kids"],
+    "prompt": ["glassmorphism css", "tailwind gradient", "neumorphism shadow"],
+    "color": ["fintech trust", "healthcare calm", "luxury gold", "gaming neon"],
+    "chart": ["trend over time", "compare categories", "funnel conversion", "geographic map"],
+    "landing": ["hero cta", "pricing comparison", "testimonial social proof"],
+    "product": ["saas dashboard", "ecommerce luxury", "crypto exchange", "beauty spa wellness"],
+    "ux": ["touch target mobile", "keyboard navigation focus", "animation reduced motion", "form validation error"],
+    "typography": ["elegant serif", "modern sans geometric", "playful rounded"],
+    "icons": ["navigation menu", "social media", "arrow direction"],
+    "react": ["rerender memo", "waterfall suspense", "bundle size barrel import"],
+    "web": ["aria label button", "autocomplete input", "focus outline visible"],
+}
+
+STACK_QUERIES = {
+    stack: ["responsive layout", "form input validation", "image optimization", "state management", "accessibility"]
+    for stack in core.AVAILABLE_STACKS
+}
+
+
+def _targets():
+    """(name, filepath, search_cols, queries, run) for every domain and stack"""
+    for domain, queries in DOMAIN_QUERIES.items():
+        config = core.CSV_CONFIG[domain]
+        yield (domain, core.DATA_DIR / config["file"], config["search_cols"], queries,
+               lambda q, d=domain: core.search(q, d, TOP_K))
+    for stack, queries in STACK_QUERIES.items():
+        config = core.STACK_CONFIG[stack]
+        yield (f"stack:{stack}", core.DATA_DIR / config["file"], core._STACK_COLS["search_cols"], queries,
+               lambda q, s=stack: core.search_stack(q, s, TOP_K))
+
+
+def _row_key(row):
+    """Stable identity of a result row: its first two output columns"""
+    return " | ".join(str(value) for value in list(row.values())[:2])
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+# ============ MEASUREMENTS ============
+def measure_build():
+    """Index build time (no caches) and traced memory of all indexes"""
+    build_times = {}
+    tracemalloc.start()
+    indexes = []
+    for name, filepath, search_cols, _, _ in _targets():
+        start = time.perf_counter()
+        indexes.append(core._build_index(filepath, search_cols))
+        build_times[name] = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return build_times, current, peak
+
+
+def run_queries(backend):
+    """Rankings and per-query latency of search()/search_stack() with hot indexes"""
+    core.BM25_BACKEND = backend
+    core._INDEX_CACHE.clear()
+
+    rankings, latencies = {}, {}
+    for name, _, _, queries, run in _targets():
+        for query in queries:
+            result = run(query)
+            rankings[f"{name}|{query}"] = [_row_key(row) for row in result.get("results", [])]
+
+            samples = []
+            for _ in range(REPEAT):
+                start = time.perf_counter()
+                run(query)
+                samples.append(time.perf_counter() - start)
+            latencies.setdefault(name, []).extend(samples)
+    return rankings, latencies
+
+
+def measure_cli(runs=5):
+    """Cold process latency of search.py (interpreter + imports + index load)"""
+    script = Path(__file__).parent / "search.py"
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, str(script), "saas dashboard", "-n", "1"], capture_output=True, check=True)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def compare(rankings, golden):
+    """List of human-readable ranking differences"""
+    diffs = []
+    for key, expected in golden.items():
+        actual = rankings.get(key)
+        if actual != expected:
+            diffs.append(f"{key}\n    expected: {expected}\n    actual:   {actual}")
+    for key in rankings.keys() - golden.keys():
+        diffs.append(f"{key}: not in golden set")
+    return diffs
+
+
+# ============ MAIN ============
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max Benchmark")
+    parser.add_argument("--update-golden", action="store_true", help="Write current rankings to the golden file")
+    parser.add_argument("--backend", choices=["python", "sparse", "all"], default="python", help="Scoring backend(s) to check")
+    parser.add_argument("--cli", action="store_true", help="Also time cold search.py processes")
+    parser.add_argument("--json", action="store_true", help="Output report as JSON")
+    args = parser.parse_args()
+
+    backends = ["python", "sparse"] if args.backend == "all" else [args.backend]
+    build_times, mem_current, mem_peak = measure_build()
+
+    report = {
+        "index_build_ms": {name: round(t * 1000, 3) for name, t in build_times.items()},
+        "index_build_total_ms": round(sum(build_times.values()) * 1000, 3),
+        "index_memory_kb": round(mem_current / 1024, 1),
+        "index_memory_peak_kb": round(mem_peak / 1024, 1),
+        "backends": {},
+    }
+
+    golden = json.loads(GOLDEN_FILE.read_text(encoding="utf-8")) if GOLDEN_FILE.exists() else None
+    failed = False
+
+    for backend in backends:
+        rankings, latencies = run_queries(backend)
+        all_samples = [s for samples in latencies.values() for s in samples]
+        entry = {
+            "p50_us": round(statistics.median(all_samples) * 1e6, 2),
+            "p99_us": round(_percentile(all_samples, 99) * 1e6, 2),
+            "per_target_p50_us": {name: round(statistics.median(s) * 1e6, 2) for name, s in latencies.items()},
+        }
+
+        if args.update_golden and backend == backends[0]:
+            GOLDEN_FILE.write_text(json.dumps(rankings, indent=2, ensure_ascii=False, sort_keys=True) + "\n", encoding="utf-8")
+            golden = rankings
+            entry["golden"] = "updated"
+        elif golden is None:
+            entry["golden"] = "missing (run with --update-golden)"
+            failed = True
+        else:
+            diffs = compare(rankings, golden)
+            entry["golden"] = "ok" if not diffs else f"{len(diffs)} mismatches"
+            entry["golden_diffs"] = diffs
+            failed = failed or bool(diffs)
+        report["backends"][backend] = entry
+
+    if args.cli:
+        samples = measure_cli()
+        report["cli_cold_ms"] = {"p50": round(statistics.median(samples) * 1000, 2), "max": round(max(samples) * 1000, 2)}
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print("## UI Pro Max Benchmark")
+        print(f"Index build: {report['index_build_total_ms']} ms total | memory {report['index_memory_kb']} KB (peak {report['index_memory_peak_kb']} KB)")
+        for backend, entry in report["backends"].items():
+            print(f"[{backend}] query p50 {entry['p50_us']} us | p99 {entry['p99_us']} us | golden: {entry['golden']}")
+            for diff in entry.get("golden_diffs", []):
+                print(f"  - {diff}")
+        if "cli_cold_ms" in report:
+            print(f"CLI cold start: p50 {report['cli_cold_ms']['p50']} ms | max {report['cli_cold_ms']['max']} ms")
+
+    sys.exit(1 if failed else 0)
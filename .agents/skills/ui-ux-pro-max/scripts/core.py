@@ -5,15 +5,36 @@ UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
 import csv
+import hashlib
+import heapq
+import os
+import pickle
 import re
+import sys
 from pathlib import Path
 from math import log
 from collections import defaultdict
+from collections.abc import Mapping
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
 MAX_RESULTS = 3
 
+# Persisted BM25 indexes, one file per CSV (rebuilt when the CSV changes)
+CACHE_DIR = Path(os.environ.get("UIPRO_CACHE_DIR", Path(__file__).parent.parent / ".cache"))
+INDEX_FORMAT_VERSION = 3
+
+# Scoring backend: "python" (BM25), "sparse" (SparseBM25, needs numpy + scipy) or
+# "auto" (sparse for corpora of at least SPARSE_MIN_DOCS rows when scipy is installed).
+# The shipped CSVs have ~100 rows or fewer, so "auto" always uses the pure-Python scorer;
+# the sparse backend is opt-in for large external corpora (per-query overhead makes it
+# several times slower at the shipped sizes, see benchmark.py --backend all).
+BM25_BACKEND = os.environ.get("UIPRO_BM25_BACKEND", "auto")
+SPARSE_MIN_DOCS = 2000
+
+# Tokenizer pattern, compiled once
+_PUNCT_RE = re.compile(r'[^\w\s]')
+
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
@@ -108,10 +129,13 @@ class BM25:
         self.idf = {}
         self.doc_freqs = defaultdict(int)
         self.N = 0
+        # Inverted index: term -> [(doc_idx, tf), ...] and per-doc length normalization
+        self.postings = {}
+        self.doc_norms = []
 
     def tokenize(self, text):
         """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
+        text = _PUNCT_RE.sub(' ', str(text).lower())
         return [w for w in text.split() if len(w) > 2]
 
     def fit(self, documents):
@@ -123,46 +147,327 @@ class BM25:
         self.doc_lengths = [len(doc) for doc in self.corpus]
         self.avgdl = sum(self.doc_lengths) / self.N
 
-        for doc in self.corpus:
-            seen = set()
+        postings = defaultdict(list)
+        for idx, doc in enumerate(self.corpus):
+            term_freqs = defaultdict(int)
             for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
+                term_freqs[word] += 1
+            for word, tf in term_freqs.items():
+                self.doc_freqs[word] += 1
+                postings[word].append((idx, tf))
+        self.postings = dict(postings)
 
         for word, freq in self.doc_freqs.items():
             self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
 
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+        self.doc_norms = [self.k1 * (1 - self.b + self.b * doc_len / self.avgdl) for doc_len in self.doc_lengths]
+
+    def to_state(self):
+        """Serializable index state (tokenized corpus, doc frequencies, IDF, doc lengths)"""
+        return {
+            "k1": self.k1, "b": self.b, "corpus": self.corpus, "doc_lengths": self.doc_lengths,
+            "avgdl": self.avgdl, "idf": self.idf, "doc_freqs": dict(self.doc_freqs), "N": self.N,
+            "postings": self.postings, "doc_norms": self.doc_norms
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Restore a fitted index from to_state() output"""
+        bm25 = cls(state["k1"], state["b"])
+        bm25.corpus = state["corpus"]
+        bm25.doc_lengths = state["doc_lengths"]
+        bm25.avgdl = state["avgdl"]
+        bm25.idf = state["idf"]
+        bm25.doc_freqs = defaultdict(int, state["doc_freqs"])
+        bm25.N = state["N"]
+        bm25.postings = state["postings"]
+        bm25.doc_norms = state["doc_norms"]
+        return bm25
+
+    def score(self, query, top_k=None):
+        """Score documents containing at least one query token; best first (ties: lower index first)"""
+        scores = defaultdict(float)
+        numerator_factor = self.k1 + 1
+
+        for token in self.tokenize(query):
+            posting = self.postings.get(token)
+            if not posting:
+                continue
+            idf = self.idf[token]
+            for idx, tf in posting:
+                scores[idx] += idf * (tf * numerator_factor) / (tf + self.doc_norms[idx])
+
+        if top_k is None:
+            return sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+        return heapq.nsmallest(top_k, scores.items(), key=lambda x: (-x[1], x[0]))
+
+    def score_many(self, queries, top_k=None):
+        """Score several queries; one ranked list per query"""
+        return [self.score(query, top_k) for query in queries]
+
+
+class SparseBM25:
+    """
+    Vectorized BM25: doc-term CSR matrix holding precomputed BM25 weights.
+
+    A query is a sparse term-count vector, so scoring is one sparse dot product,
+    and a batch of queries is one sparse matrix product. Rankings match BM25.score
+    (same weights; only float summation order differs).
+
+    Opt-in for large external corpora only (UIPRO_BM25_BACKEND=sparse, or "auto" past
+    SPARSE_MIN_DOCS rows): on the shipped CSVs it is slower than BM25.score.
+    Agreement with BM25.score is checked by benchmark.py's golden set (--backend all).
+    """
+
+    def __init__(self, bm25):
+        import numpy as np
+        from scipy.sparse import csr_matrix
+
+        self._np = np
+        self._csr_matrix = csr_matrix
+        self.bm25 = bm25
+        self.vocab = {term: j for j, term in enumerate(bm25.postings)}
+
+        rows, cols, weights = [], [], []
+        numerator_factor = bm25.k1 + 1
+        for term, j in self.vocab.items():
+            idf = bm25.idf[term]
+            for idx, tf in bm25.postings[term]:
+                rows.append(idx)
+                cols.append(j)
+                weights.append(idf * (tf * numerator_factor) / (tf + bm25.doc_norms[idx]))
+
+        self.matrix = csr_matrix(
+            (np.asarray(weights, dtype=np.float64), (rows, cols)),
+            shape=(bm25.N, len(self.vocab))
+        )
+
+    def _query_matrix(self, queries):
+        """(V x Q) term-count matrix; repeated query tokens count repeatedly, like BM25.score"""
+        term_idx, query_idx = [], []
+        for q, query in enumerate(queries):
+            for token in self.bm25.tokenize(query):
+                j = self.vocab.get(token)
+                if j is not None:
+                    term_idx.append(j)
+                    query_idx.append(q)
+        counts = self._np.ones(len(term_idx), dtype=self._np.float64)
+        return self._csr_matrix((counts, (term_idx, query_idx)), shape=(len(self.vocab), len(queries)))
+
+    def _rank(self, doc_idx, scores, top_k):
+        np = self._np
+        order = np.lexsort((doc_idx, -scores))
+        if top_k is not None:
+            order = order[:top_k]
+        return [(int(doc_idx[i]), float(scores[i])) for i in order]
+
+    def score(self, query, top_k=None):
+        """Score documents containing at least one query token; best first (ties: lower index first)"""
+        return self.score_many([query], top_k)[0]
+
+    def score_many(self, queries, top_k=None):
+        """Score a batch of queries with a single sparse matrix product"""
+        if not queries:
+            return []
+        result = (self.matrix @ self._query_matrix(queries)).tocsc()
+        result.sum_duplicates()
+        ranked = []
+        for q in range(len(queries)):
+            start, end = result.indptr[q], result.indptr[q + 1]
+            ranked.append(self._rank(result.indices[start:end], result.data[start:end], top_k))
+        return ranked
+
+
+def _make_scorer(bm25, backend=None):
+    """Pick the scoring backend for a fitted BM25 index"""
+    backend = backend or BM25_BACKEND
+    if backend == "python":
+        return bm25
+    if backend == "auto" and bm25.N < SPARSE_MIN_DOCS:
+        return bm25
+    try:
+        return SparseBM25(bm25)
+    except ImportError:
+        if backend == "sparse":
+            raise
+        return bm25
+
+
+# ============ COMPACT DATA STORE ============
+class Row(Mapping):
+    """Read-only dict-like view of one ColumnStore row (no per-row dict)"""
+    __slots__ = ("_store", "_idx")
+
+    def __init__(self, store, idx):
+        self._store = store
+        self._idx = idx
+
+    def __getitem__(self, col):
+        return self._store.columns[self._store.positions[col]][self._idx]
+
+    def get(self, col, default=None):
+        pos = self._store.positions.get(col)
+        return default if pos is None else self._store.columns[pos][self._idx]
+
+    def __contains__(self, col):
+        return col in self._store.positions
+
+    def __iter__(self):
+        return iter(self._store.fieldnames)
+
+    def __len__(self):
+        return len(self._store.fieldnames)
+
+    def __repr__(self):
+        return f"Row({dict(self)!r})"
+
+
+class ColumnStore:
+    """CSV rows as one tuple per column with interned strings.
+
+    Column names are stored once instead of once per row, and repeated values
+    (types, severities, categories shared between CSVs) are a single object.
+    Indexing returns a Row view that supports get(), `in`, items() like the
+    dicts of csv.DictReader.
+    """
+    __slots__ = ("fieldnames", "positions", "columns", "size")
+
+    def __init__(self, fieldnames, rows):
+        self.fieldnames = tuple(sys.intern(name) for name in fieldnames)
+        self.positions = {name: pos for pos, name in enumerate(self.fieldnames)}
+        width = len(self.fieldnames)
+        columns = [[] for _ in range(width)]
+        size = 0
+        for values in rows:
+            if not values:
+                continue  # blank line (skipped by DictReader as well)
+            for pos in range(width):
+                # Short rows get None, like DictReader's restval
+                columns[pos].append(sys.intern(values[pos]) if pos < len(values) else None)
+            size += 1
+        self.columns = tuple(tuple(column) for column in columns)
+        self.size = size
+
+    @classmethod
+    def from_csv(cls, filepath):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            fieldnames = next(reader, [])
+            return cls(fieldnames, reader)
+
+    def __getstate__(self):
+        return (self.fieldnames, self.columns, self.size)
+
+    def __setstate__(self, state):
+        self.fieldnames, self.columns, self.size = state
+        self.positions = {name: pos for pos, name in enumerate(self.fieldnames)}
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += self.size
+        if not 0 <= idx < self.size:
+            raise IndexError("row index out of range")
+        return Row(self, idx)
+
+    def __iter__(self):
+        for idx in range(self.size):
+            yield Row(self, idx)
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+# ============ SEARCH FUNCTIONS ============
+def _load_csv(filepath):
+    """Load CSV into a ColumnStore (sequence of dict-like rows)"""
+    return ColumnStore.from_csv(filepath)
 
-            scores.append((idx, score))
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+# In-process index cache: (filepath, search_cols) -> (fingerprint, data, scorer)
+_INDEX_CACHE = {}
 
 
-# ============ SEARCH FUNCTIONS ============
-def _load_csv(filepath):
-    """Load CSV and return list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return list(csv.DictReader(f))
+def _file_fingerprint(filepath):
+    """Cheap change detector: (mtime_ns, size)"""
+    st = filepath.stat()
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _file_hash(filepath):
+    with open(filepath, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _index_cache_path(filepath, search_cols):
+    key = hashlib.sha1(f"{filepath.resolve()}|{'|'.join(search_cols)}".encode('utf-8')).hexdigest()[:16]
+    return CACHE_DIR / f"{filepath.stem}-{key}.pkl"
+
+
+def _build_index(filepath, search_cols):
+    """Parse CSV and fit BM25 over the search columns"""
+    data = _load_csv(filepath)
+    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    bm25 = BM25()
+    bm25.fit(documents)
+    return data, bm25
+
+
+def _load_persisted_index(cache_path, fingerprint, filepath):
+    """Return (data, bm25) from disk if still valid for the CSV, else None"""
+    try:
+        with open(cache_path, 'rb') as f:
+            payload = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    if payload.get("version") != INDEX_FORMAT_VERSION:
+        return None
+    if payload.get("fingerprint") != fingerprint:
+        # mtime/size changed: still valid if the content hash is the same (e.g. fresh checkout)
+        if payload.get("sha256") != _file_hash(filepath):
+            return None
+        payload["fingerprint"] = fingerprint
+        _write_persisted_index(cache_path, payload)
+    return payload["data"], BM25.from_state(payload["bm25"])
+
+
+def _write_persisted_index(cache_path, payload):
+    """Atomic write; a read-only skill directory just means no persistence"""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+
+
+def _get_index(filepath, search_cols):
+    """Load (data, scorer) for a CSV: memory -> disk -> rebuild"""
+    key = (str(filepath), tuple(search_cols))
+    fingerprint = _file_fingerprint(filepath)
+
+    cached = _INDEX_CACHE.get(key)
+    if cached and cached[0] == fingerprint:
+        return cached[1], cached[2]
+
+    cache_path = _index_cache_path(filepath, search_cols)
+    loaded = _load_persisted_index(cache_path, fingerprint, filepath)
+    if loaded is None:
+        data, bm25 = _build_index(filepath, search_cols)
+        _write_persisted_index(cache_path, {
+            "version": INDEX_FORMAT_VERSION,
+            "fingerprint": fingerprint,
+            "sha256": _file_hash(filepath),
+            "data": data,
+            "bm25": bm25.to_state()
+        })
+    else:
+        data, bm25 = loaded
+
+    scorer = _make_scorer(bm25)
+    _INDEX_CACHE[key] = (fingerprint, data, scorer)
+    return data, scorer
 
 
 def _search_csv(filepath, search_cols, output_cols, query, max_results):
@@ -170,17 +475,13 @@ def _search_csv(filepath, search_cols, output_cols, query, max_results):
     if not filepath.exists():
         return []
 
-    data = _load_csv(filepath)
-
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    data, scorer = _get_index(filepath, search_cols)
+    ranked = scorer.score(query, top_k=max_results)
+    return _collect_results(data, ranked, output_cols, max_results)
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
 
-    # Get top results with score > 0
+def _collect_results(data, ranked, output_cols, max_results):
+    """Get top results with score > 0"""
     results = []
     for idx, score in ranked[:max_results]:
         if score > 0:
@@ -190,25 +491,90 @@ def _search_csv(filepath, search_cols, output_cols, query, max_results):
     return results
 
 
+# ============ DOMAIN DETECTION ============
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
+    "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
+    "typography": ["font", "typography", "heading", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
+    "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+}
+
+
+def _keyword_weight(keyword):
+    """Multi-word phrases ("dark mode", "server component") are more specific than single words"""
+    return float(len(keyword.split()))
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton: finds every keyword occurring in a text in one pass"""
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(keywords))
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+
+        for kw_id, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                state = nxt
+            self._out[state] += (kw_id,)
+
+        # Breadth-first failure links
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] += self._out[self._fail[nxt]]
+
+    def find(self, text):
+        """Set of keywords that occur in text (substring semantics)"""
+        found = set()
+        state = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return {self.keywords[kw_id] for kw_id in found}
+
+
+# keyword -> [(domain, weight)], and one automaton over all keywords (built once at import)
+_DOMAIN_KEYWORD_INDEX = defaultdict(list)
+for _domain, _keywords in DOMAIN_KEYWORDS.items():
+    for _kw in _keywords:
+        _DOMAIN_KEYWORD_INDEX[_kw].append((_domain, _keyword_weight(_kw)))
+_DOMAIN_MATCHER = KeywordMatcher(_DOMAIN_KEYWORD_INDEX)
+
+
 def detect_domain(query):
     """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
-    }
+    scores = dict.fromkeys(DOMAIN_KEYWORDS, 0.0)
+    for keyword in _DOMAIN_MATCHER.find(query.lower()):
+        for domain, weight in _DOMAIN_KEYWORD_INDEX[keyword]:
+            scores[domain] += weight
 
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
     best = max(scores, key=scores.get)
     return best if scores[best] > 0 else "style"
 
@@ -255,3 +621,69 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
         "count": len(results),
         "results": results
     }
+
+
+def _request_error(req):
+    """Reason a batch request is malformed, or None"""
+    if not isinstance(req, dict):
+        return "Request must be a JSON object"
+    for key in ("query", "domain", "stack"):
+        if req.get(key) is not None and not isinstance(req[key], str):
+            return f"'{key}' must be a string"
+    max_results = req.get("max_results")
+    if max_results is not None and (isinstance(max_results, bool) or not isinstance(max_results, int) or max_results < 1):
+        return "'max_results' must be a positive integer"
+    return None
+
+
+def search_batch(requests):
+    """Run many searches against the shared in-memory indexes.
+
+    requests: iterable of dicts {"query", "domain"?, "stack"?, "max_results"?}
+    Returns one result per request, in order, shaped like search() / search_stack().
+    Queries that hit the same CSV are scored together with score_many().
+    A malformed request gets {"error": ...} in its slot; the others still run.
+    """
+    requests = list(requests)
+    outputs = [None] * len(requests)
+    groups = defaultdict(list)
+
+    for i, req in enumerate(requests):
+        error = _request_error(req)
+        if error:
+            outputs[i] = {"error": f"Invalid request: {error}"}
+            continue
+        query = str(req.get("query", ""))
+        max_results = req.get("max_results") or MAX_RESULTS
+        stack = req.get("stack")
+
+        if stack:
+            if stack not in STACK_CONFIG:
+                outputs[i] = {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
+                continue
+            file = STACK_CONFIG[stack]["file"]
+            search_cols, output_cols = _STACK_COLS["search_cols"], _STACK_COLS["output_cols"]
+            header = {"domain": "stack", "stack": stack, "query": query, "file": file}
+            missing = {"error": f"Stack file not found: {DATA_DIR / file}", "stack": stack}
+        else:
+            domain = req.get("domain") or detect_domain(query)
+            config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+            file = config["file"]
+            search_cols, output_cols = config["search_cols"], config["output_cols"]
+            header = {"domain": domain, "query": query, "file": file}
+            missing = {"error": f"File not found: {DATA_DIR / file}", "domain": domain}
+
+        if not (DATA_DIR / file).exists():
+            outputs[i] = missing
+            continue
+        groups[(file, tuple(search_cols), tuple(output_cols))].append((i, header, max_results))
+
+    for (file, search_cols, output_cols), items in groups.items():
+        data, scorer = _get_index(DATA_DIR / file, list(search_cols))
+        top_k = max(max_results for _, _, max_results in items)
+        ranked_lists = scorer.score_many([header["query"] for _, header, _ in items], top_k=top_k)
+        for (i, header, max_results), ranked in zip(items, ranked_lists):
+            results = _collect_results(data, ranked, output_cols, max_results)
+            outputs[i] = dict(header, count=len(results), results=results)
+
+    return outputs
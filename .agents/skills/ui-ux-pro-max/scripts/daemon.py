@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Search Daemon - keeps every domain and stack index hot in one process
+Usage: python search.py --serve [--socket /path/to.sock]
+       python search.py "<query>" --socket /path/to.sock   (client; falls back to local search)
+
+Protocol: one JSON object per line over a Unix socket.
+    {"op": "search", "query": "...", "domain": null, "max_results": 3}
+    {"op": "stack", "query": "...", "stack": "react", "max_results": 3}
+    {"op": "design_system", "query": "...", "project_name": null, "format": "ascii"}
+    {"op": "batch", "requests": [{"query": "...", "domain": "...", "stack": "...", "max_results": 3}, ...]}
+    {"op": "ping"}
+Reply: {"ok": true, "result": ...} or {"ok": false, "error": "..."}
+"""
+
+import json
+import os
+import signal
+import socket
+import tempfile
+from pathlib import Path
+
+# Default socket (override with --socket or UIPRO_SOCKET)
+DEFAULT_SOCKET = os.environ.get(
+    "UIPRO_SOCKET",
+    str(Path(tempfile.gettempdir()) / f"uipro-{os.getuid() if hasattr(os, 'getuid') else 'user'}.sock")
+)
+CLIENT_TIMEOUT = 30.0
+
+
+# ============ CLIENT ============
+def request(payload, socket_path=DEFAULT_SOCKET, timeout=CLIENT_TIMEOUT):
+    """Send one request to the daemon. Returns the result, or None if no daemon is listening."""
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except OSError:
+        return None
+    if not line:
+        return None
+    reply = json.loads(line)
+    if not reply.get("ok"):
+        raise RuntimeError(reply.get("error", "daemon error"))
+    return reply["result"]
+
+
+# ============ SERVER ============
+def _warm_indexes():
+    """Load every domain and stack index into memory"""
+    from core import CSV_CONFIG, STACK_CONFIG, DATA_DIR, _STACK_COLS, _get_index
+
+    for config in CSV_CONFIG.values():
+        filepath = DATA_DIR / config["file"]
+        if filepath.exists():
+            _get_index(filepath, config["search_cols"])
+    for config in STACK_CONFIG.values():
+        filepath = DATA_DIR / config["file"]
+        if filepath.exists():
+            _get_index(filepath, _STACK_COLS["search_cols"])
+
+
+def handle(payload):
+    """Dispatch one request. Indexes are revalidated against file mtimes on every lookup."""
+    from core import MAX_RESULTS, search, search_stack, search_batch
+
+    op = payload.get("op", "search")
+    max_results = payload.get("max_results") or MAX_RESULTS
+    if op == "ping":
+        return {"pid": os.getpid()}
+    if op == "search":
+        return search(payload["query"], payload.get("domain"), max_results)
+    if op == "stack":
+        return search_stack(payload["query"], payload["stack"], max_results)
+    if op == "batch":
+        return search_batch(payload["requests"])
+    if op == "design_system":
+        from design_system import generate_design_system
+        return generate_design_system(payload["query"], payload.get("project_name"), payload.get("format", "ascii"))
+    raise ValueError(f"Unknown op: {op}")
+
+
+def _remove_stale_socket(socket_path):
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            os.unlink(socket_path)
+            return
+    raise RuntimeError(f"A daemon is already listening on {socket_path}")
+
+
+def serve(socket_path=DEFAULT_SOCKET):
+    """Run the daemon until interrupted"""
+    import socketserver
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("Unix sockets are not available on this platform")
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                try:
+                    reply = {"ok": True, "result": handle(json.loads(line))}
+                except Exception as e:
+                    reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                self.wfile.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    _remove_stale_socket(socket_path)
+    _warm_indexes()
+
+    old_umask = os.umask(0o077)  # socket readable by the owner only
+    try:
+        server = Server(socket_path, Handler)
+    finally:
+        os.umask(old_umask)
+
+    def _terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _terminate)
+
+    print(f"UI Pro Max daemon listening on {socket_path} (pid {os.getpid()})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
@@ -9,10 +9,13 @@ Usage:
     result = generate_design_system("SaaS dashboard", "My Project")
 """
 
-import csv
+import hashlib
 import json
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from core import search, DATA_DIR
+from core import search, DATA_DIR, CSV_CONFIG, CACHE_DIR, _file_fingerprint, _load_csv
 
 
 # ============ CONFIGURATION ============
@@ -26,80 +29,71 @@ SEARCH_CONFIG = {
     "typography": {"max_results": 2}
 }
 
+# Shared pool for the per-domain searches (created on first use)
+_SEARCH_POOL = None
+
+
+def _get_search_pool():
+    """ThreadPoolExecutor for domain searches (imported lazily: keeps module import cheap)"""
+    global _SEARCH_POOL
+    if _SEARCH_POOL is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _SEARCH_POOL = ThreadPoolExecutor(max_workers=len(SEARCH_CONFIG), thread_name_prefix="uipro-search")
+    return _SEARCH_POOL
+
+
+# ============ REASONING RULE INDEX ============
+DEFAULT_REASONING = {
+    "pattern": "Hero + Features + CTA",
+    "style_priority": ["Minimalism", "Flat Design"],
+    "color_mood": "Professional",
+    "typography_mood": "Clean",
+    "key_effects": "Subtle hover transitions",
+    "anti_patterns": "",
+    "decision_rules": {},
+    "severity": "MEDIUM"
+}
 
-# ============ DESIGN SYSTEM GENERATOR ============
-class DesignSystemGenerator:
-    """Generates design system recommendations from aggregated searches."""
 
-    def __init__(self):
-        self.reasoning_data = self._load_reasoning()
+def _substrings(text: str):
+    """All substrings of text, including the empty string."""
+    yield ""
+    for start in range(len(text)):
+        for end in range(start + 1, len(text) + 1):
+            yield text[start:end]
 
-    def _load_reasoning(self) -> list:
-        """Load reasoning rules from CSV."""
-        filepath = DATA_DIR / REASONING_FILE
-        if not filepath.exists():
-            return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
 
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
-        for domain, config in SEARCH_CONFIG.items():
-            if domain == "style" and style_priority:
-                # For style, also search with priority keywords
-                priority_query = " ".join(style_priority[:2]) if style_priority else query
-                combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
-            else:
-                results[domain] = search(query, domain, config["max_results"])
-        return results
+class ReasoningIndex:
+    """Precomputed lookup for ui-reasoning.csv rules.
 
-    def _find_reasoning_rule(self, category: str) -> dict:
-        """Find matching reasoning rule for a category."""
-        category_lower = category.lower()
-
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
+    Built once per load. Resolution has the same precedence as a linear scan
+    (exact > partial > keyword, first rule in file order wins), but its cost only
+    depends on the length of the category, not on the number of rules.
+    """
 
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
+    def __init__(self, rules: list):
+        self.rules = rules
+        self.reasoning = [self._to_reasoning(rule) for rule in rules]
+        self.exact = {}        # UI_Category -> first rule index
+        self.containing = {}   # any substring of a UI_Category -> first rule index
+        self.keywords = {}     # UI_Category word -> first rule index
+        self._memo = {}
 
-        # Try keyword match
-        for rule in self.reasoning_data:
+        for idx, rule in enumerate(rules):
             ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
-
-        return {}
-
-    def _apply_reasoning(self, category: str, search_results: dict) -> dict:
-        """Apply reasoning rules to search results."""
-        rule = self._find_reasoning_rule(category)
-
-        if not rule:
-            return {
-                "pattern": "Hero + Features + CTA",
-                "style_priority": ["Minimalism", "Flat Design"],
-                "color_mood": "Professional",
-                "typography_mood": "Clean",
-                "key_effects": "Subtle hover transitions",
-                "anti_patterns": "",
-                "decision_rules": {},
-                "severity": "MEDIUM"
-            }
-
-        # Parse decision rules JSON
+            self.exact.setdefault(ui_cat, idx)
+            for sub in _substrings(ui_cat):
+                self.containing.setdefault(sub, idx)
+            for kw in ui_cat.replace("/", " ").replace("-", " ").split():
+                self.keywords.setdefault(kw, idx)
+
+    @staticmethod
+    def _to_reasoning(rule: dict) -> dict:
+        """Rule row -> reasoning dict (Decision_Rules JSON parsed once here)."""
         decision_rules = {}
         try:
             decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, TypeError):
             pass
 
         return {
@@ -113,6 +107,88 @@ class DesignSystemGenerator:
             "severity": rule.get("Severity", "MEDIUM")
         }
 
+    def find(self, category: str) -> int:
+        """Index of the matching rule, or -1."""
+        category_lower = category.lower()
+        cached = self._memo.get(category_lower)
+        if cached is not None:
+            return cached
+
+        # Exact match
+        idx = self.exact.get(category_lower)
+        if idx is None:
+            subs = set(_substrings(category_lower))
+            # Partial match: UI_Category inside category, or category inside UI_Category
+            candidates = [self.exact[sub] for sub in subs if sub in self.exact]
+            if category_lower in self.containing:
+                candidates.append(self.containing[category_lower])
+            if not candidates:
+                # Keyword match: any UI_Category word inside category
+                candidates = [self.keywords[sub] for sub in subs if sub in self.keywords]
+            idx = min(candidates) if candidates else -1
+
+        self._memo[category_lower] = idx
+        return idx
+
+    def rule(self, category: str) -> dict:
+        idx = self.find(category)
+        return self.rules[idx] if idx >= 0 else {}
+
+    def reasoning_for(self, category: str) -> dict:
+        idx = self.find(category)
+        reasoning = self.reasoning[idx] if idx >= 0 else DEFAULT_REASONING
+        # Copy the mutable parts; the precomputed entries are shared
+        return dict(reasoning, style_priority=list(reasoning["style_priority"]),
+                    decision_rules=dict(reasoning["decision_rules"]))
+
+
+# ============ DESIGN SYSTEM GENERATOR ============
+class DesignSystemGenerator:
+    """Generates design system recommendations from aggregated searches."""
+
+    def __init__(self):
+        self.reasoning_data = self._load_reasoning()
+        self.reasoning_index = ReasoningIndex(self.reasoning_data)
+
+    def _load_reasoning(self) -> list:
+        """Load reasoning rules from CSV."""
+        filepath = DATA_DIR / REASONING_FILE
+        if not filepath.exists():
+            return []
+        return _load_csv(filepath)
+
+    def _submit_searches(self, query: str, domains: list, style_priority: list = None) -> dict:
+        """Start domain searches on the shared pool; returns {domain: future}."""
+        pool = _get_search_pool()
+        futures = {}
+        for domain in domains:
+            config = SEARCH_CONFIG[domain]
+            domain_query = query
+            if domain == "style" and style_priority:
+                # For style, also search with priority keywords
+                priority_query = " ".join(style_priority[:2]) if style_priority else query
+                domain_query = f"{query} {priority_query}"
+            futures[domain] = pool.submit(search, domain_query, domain, config["max_results"])
+        return futures
+
+    def _multi_domain_search(self, query: str, style_priority: list = None, pending: dict = None) -> dict:
+        """Execute searches across multiple domains concurrently.
+
+        `pending` holds futures of domain searches already in flight; they are reused, not rerun.
+        """
+        pending = dict(pending or {})
+        missing = [domain for domain in SEARCH_CONFIG if domain not in pending]
+        pending.update(self._submit_searches(query, missing, style_priority))
+        return {domain: pending[domain].result() for domain in SEARCH_CONFIG}
+
+    def _find_reasoning_rule(self, category: str) -> dict:
+        """Find matching reasoning rule for a category."""
+        return self.reasoning_index.rule(category)
+
+    def _apply_reasoning(self, category: str, search_results: dict) -> dict:
+        """Apply reasoning rules to search results."""
+        return self.reasoning_index.reasoning_for(category)
+
     def _select_best_match(self, results: list, priority_keywords: list) -> dict:
         """Select best matching result based on priority keywords."""
         if not results:
@@ -156,8 +232,10 @@ class DesignSystemGenerator:
 
     def generate(self, query: str, project_name: str = None) -> dict:
         """Generate complete design system recommendation."""
-        # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
+        # Step 1: Start every domain search that does not depend on the reasoning rule;
+        # product gives the category, style waits for its priority keywords
+        pending = self._submit_searches(query, [d for d in SEARCH_CONFIG if d != "style"])
+        product_result = pending["product"].result()
         product_results = product_result.get("results", [])
         category = "General"
         if product_results:
@@ -167,9 +245,8 @@ class DesignSystemGenerator:
         reasoning = self._apply_reasoning(category, {})
         style_priority = reasoning.get("style_priority", [])
 
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        # Step 3: Multi-domain search with style priority hints (reuses the in-flight searches)
+        search_results = self._multi_domain_search(query, style_priority, pending)
 
         # Step 4: Select best matches from each domain using priority
         style_results = self._extract_results(search_results.get("style", {}))
@@ -452,8 +529,141 @@ def format_markdown(design_system: dict) -> str:
     return "\n".join(lines)
 
 
+# ============ RESULT CACHE ============
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE_DISK_SIZE = 2048  # files kept in RESULT_CACHE_DIR; least recently used are pruned
+RESULT_CACHE_DIR = CACHE_DIR / "design_system"
+RESULT_CACHE_VERSION = 1
+
+_GENERATOR = None
+_GENERATOR_FINGERPRINT = None
+_GENERATOR_LOCK = threading.Lock()
+_RESULT_CACHE = OrderedDict()  # key -> (fingerprint, output)
+_RESULT_CACHE_LOCK = threading.Lock()  # the daemon generates on many threads at once
+
+
+def _fingerprint(filepath: Path):
+    return _file_fingerprint(filepath) if filepath.exists() else None
+
+
+def _data_fingerprint() -> tuple:
+    """(mtime_ns, size) of every file a design system is built from."""
+    files = [CSV_CONFIG[domain]["file"] for domain in SEARCH_CONFIG] + [REASONING_FILE]
+    return tuple(_fingerprint(DATA_DIR / name) for name in files)
+
+
+def _get_generator() -> DesignSystemGenerator:
+    """Shared generator; rebuilt only when ui-reasoning.csv changes."""
+    global _GENERATOR, _GENERATOR_FINGERPRINT
+    fingerprint = _fingerprint(DATA_DIR / REASONING_FILE)
+    if _GENERATOR is None or _GENERATOR_FINGERPRINT != fingerprint:
+        with _GENERATOR_LOCK:
+            if _GENERATOR is None or _GENERATOR_FINGERPRINT != fingerprint:
+                _GENERATOR = DesignSystemGenerator()
+                _GENERATOR_FINGERPRINT = fingerprint
+    return _GENERATOR
+
+
+def _cache_key(query: str, project_name: str, output_format: str) -> tuple:
+    # Search is case- and whitespace-insensitive; the header is not, so it is keyed separately
+    normalized = " ".join(query.lower().split())
+    return (normalized, project_name or query.upper(), output_format)
+
+
+def _disk_cache_path(key: tuple) -> Path:
+    digest = hashlib.sha1(json.dumps(key, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return RESULT_CACHE_DIR / f"{digest}.json"
+
+
+def _read_disk_cache(key: tuple, fingerprint: tuple):
+    try:
+        with open(_disk_cache_path(key), "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if payload.get("version") != RESULT_CACHE_VERSION or payload.get("key") != list(key):
+        return None
+    if payload.get("fingerprint") != [list(fp) if fp else None for fp in fingerprint]:
+        return None
+    try:
+        os.utime(_disk_cache_path(key))  # mtime = last use, for pruning
+    except OSError:
+        pass
+    return payload.get("output")
+
+
+def _prune_disk_cache():
+    """Keep the RESULT_CACHE_DISK_SIZE most recently used files."""
+    try:
+        entries = []
+        for path in RESULT_CACHE_DIR.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime_ns, path))
+            except OSError:
+                continue  # removed by a concurrent prune
+        if len(entries) <= RESULT_CACHE_DISK_SIZE:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - RESULT_CACHE_DISK_SIZE]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    except OSError:
+        pass
+
+
+def _write_disk_cache(key: tuple, fingerprint: tuple, output: str):
+    """Atomic write; a read-only skill directory just means no persistence"""
+    cache_path = _disk_cache_path(key)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": RESULT_CACHE_VERSION,
+                "key": list(key),
+                "fingerprint": [list(fp) if fp else None for fp in fingerprint],
+                "output": output
+            }, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        return
+    _prune_disk_cache()
+
+
+def _recall(key: tuple, fingerprint: tuple):
+    with _RESULT_CACHE_LOCK:
+        cached = _RESULT_CACHE.get(key)
+        if cached and cached[0] == fingerprint:
+            _RESULT_CACHE.move_to_end(key)
+            return cached[1]
+    return None
+
+
+def _remember(key: tuple, fingerprint: tuple, output: str):
+    with _RESULT_CACHE_LOCK:
+        _RESULT_CACHE[key] = (fingerprint, output)
+        _RESULT_CACHE.move_to_end(key)
+        while len(_RESULT_CACHE) > RESULT_CACHE_SIZE:
+            _RESULT_CACHE.popitem(last=False)
+
+
+def clear_cache(disk: bool = False):
+    """Drop memoized design systems (and the on-disk tier if disk=True)."""
+    with _RESULT_CACHE_LOCK:
+        _RESULT_CACHE.clear()
+    if disk and RESULT_CACHE_DIR.exists():
+        for path in RESULT_CACHE_DIR.glob("*.json"):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
 # ============ MAIN ENTRY POINT ============
-def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii") -> str:
+def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii",
+                           use_cache: bool = True) -> str:
     """
     Main entry point for design system generation.
 
@@ -461,16 +671,34 @@ def generate_design_system(query: str, project_name: str = None, output_format:
         query: Search query (e.g., "SaaS dashboard", "e-commerce luxury")
         project_name: Optional project name for output header
         output_format: "ascii" (default) or "markdown"
+        use_cache: Reuse results for the same query while the data files are unchanged
 
     Returns:
         Formatted design system string
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name)
+    output_format = "markdown" if output_format == "markdown" else "ascii"
+    if use_cache:
+        key = _cache_key(query, project_name, output_format)
+        fingerprint = _data_fingerprint()
+        output = _recall(key, fingerprint)
+        if output is not None:
+            return output
+        output = _read_disk_cache(key, fingerprint)
+        if output is not None:
+            _remember(key, fingerprint, output)
+            return output
+
+    design_system = _get_generator().generate(query, project_name)
 
     if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+        output = format_markdown(design_system)
+    else:
+        output = format_ascii_box(design_system)
+
+    if use_cache:
+        _remember(key, fingerprint, output)
+        _write_disk_cache(key, fingerprint, output)
+    return output
 
 
 # ============ CLI SUPPORT ============
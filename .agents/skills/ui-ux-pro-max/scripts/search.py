@@ -4,14 +4,47 @@
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
 Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
        python search.py "<query>" --design-system [-p "Project Name"]
+       python search.py --batch [queries.txt|-]              (one query per line -> JSONL)
+       python search.py --serve [--socket /path/to.sock]     (keep indexes hot, see daemon.py)
+       python search.py "<query>" --socket /path/to.sock     (ask the daemon, fall back to local)
+       python search.py "<query>" --timings                  (startup/phase timings on stderr)
 
 Domains: style, prompt, color, chart, landing, product, ux, typography
 Stacks: html-tailwind, react, nextjs
 """
 
+import time
+_T_START = time.perf_counter()
+
 import argparse
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system
+import json
+import os
+import sys
+from contextlib import contextmanager
+from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack, search_batch
+
+
+# ============ TIMINGS (--timings or UIPRO_TIMINGS=1) ============
+TIMINGS = [("import core + stdlib", time.perf_counter() - _T_START)]
+
+
+@contextmanager
+def timed(label):
+    """Record wall time of a phase (lazy imports, search, output)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        TIMINGS.append((label, time.perf_counter() - start))
+
+
+def print_timings(stream=sys.stderr):
+    """-X importtime style summary of where the CLI spent its time"""
+    total = time.perf_counter() - _T_START
+    print("timing:   self [ms] | phase", file=stream)
+    for label, seconds in TIMINGS:
+        print(f"timing: {seconds * 1000:10.2f} | {label}", file=stream)
+    print(f"timing: {total * 1000:10.2f} | total (since search.py start)", file=stream)
 
 
 def format_output(result):
@@ -40,37 +73,126 @@ def format_output(result):
     return "\n".join(output)
 
 
+def parse_batch_line(line, default_max_results=MAX_RESULTS):
+    """One batch line -> request dict.
+
+    Accepts a JSON object ({"query", "domain", "stack", "max_results"}) or plain text:
+    "<query>" / "<query>\t<domain>" / "<query>\tstack:<stack>".
+    """
+    line = line.strip()
+    if line.startswith("{"):
+        request = json.loads(line)
+    else:
+        query, _, target = line.partition("\t")
+        request = {"query": query}
+        target = target.strip()
+        if target.startswith("stack:"):
+            request["stack"] = target[len("stack:"):]
+        elif target:
+            request["domain"] = target
+    request.setdefault("max_results", default_max_results)
+    return request
+
+
+def run_batch(lines, max_results=MAX_RESULTS, socket_path=None):
+    """Score all batch lines in one process; yields JSONL strings in input order"""
+    requests, errors = [], {}
+    for n, line in enumerate(lines, 1):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        try:
+            requests.append((n, parse_batch_line(line, max_results)))
+        except ValueError as e:
+            errors[n] = {"line": n, "error": f"Invalid batch line: {e}"}
+
+    results = None
+    if socket_path:
+        from daemon import request
+        results = request({"op": "batch", "requests": [r for _, r in requests]}, socket_path)
+    if results is None:
+        results = search_batch([r for _, r in requests])
+
+    outputs = dict(errors)
+    for (n, _), result in zip(requests, results):
+        outputs[n] = dict(result, line=n)
+    for n in sorted(outputs):
+        yield json.dumps(outputs[n], ensure_ascii=False)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
+    parser.add_argument("query", nargs="?", help="Search query")
     parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
     parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--batch", nargs="?", const="-", metavar="FILE", help="Batch mode: queries from FILE (or stdin), JSONL output")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
     parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format for design system")
+    # Daemon mode
+    parser.add_argument("--serve", action="store_true", help="Run the search daemon on a Unix socket")
+    parser.add_argument("--socket", type=str, default=os.environ.get("UIPRO_SOCKET"), help="Daemon socket path (client uses it when reachable)")
+    parser.add_argument("--timings", action="store_true", default=os.environ.get("UIPRO_TIMINGS") == "1", help="Print startup/phase timings to stderr")
 
     args = parser.parse_args()
+    if args.timings:
+        import atexit
+        atexit.register(print_timings)
+
+    if args.serve:
+        from daemon import DEFAULT_SOCKET, serve
+        serve(args.socket or DEFAULT_SOCKET)
+        raise SystemExit(0)
+    if args.batch:
+        source = sys.stdin if args.batch == "-" else open(args.batch, "r", encoding="utf-8")
+        with source, timed("batch"):
+            for output_line in run_batch(source, args.max_results, args.socket):
+                print(output_line)
+        raise SystemExit(0)
+    if not args.query:
+        parser.error("the following arguments are required: query")
+
+    # Ask a running daemon first (hot indexes); None means no daemon -> search locally
+    remote = None
+    if args.socket:
+        with timed("import daemon"):
+            from daemon import request
+        if args.design_system:
+            payload = {"op": "design_system", "query": args.query, "project_name": args.project_name, "format": args.format}
+        elif args.stack:
+            payload = {"op": "stack", "query": args.query, "stack": args.stack, "max_results": args.max_results}
+        else:
+            payload = {"op": "search", "query": args.query, "domain": args.domain, "max_results": args.max_results}
+        with timed("daemon request"):
+            remote = request(payload, args.socket)
 
     # Design system takes priority
     if args.design_system:
-        result = generate_design_system(args.query, args.project_name, args.format)
-        print(result)
+        result = remote
+        if result is None:
+            with timed("import design_system"):
+                from design_system import generate_design_system
+            with timed("design system"):
+                result = generate_design_system(args.query, args.project_name, args.format)
+        with timed("output"):
+            print(result)
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
+        with timed("search (incl. index load)"):
+            result = remote if remote is not None else search_stack(args.query, args.stack, args.max_results)
+        with timed("output"):
+            if args.json:
+                print(json.dumps(result, indent=2, ensure_ascii=False))
+            else:
+                print(format_output(result))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
+        with timed("search (incl. index load)"):
+            result = remote if remote is not None else search(args.query, args.domain, args.max_results)
+        with timed("output"):
+            if args.json:
+                print(json.dumps(result, indent=2, ensure_ascii=False))
+            else:
+                print(format_output(result))
@@ -1,6 +1,106 @@
-from typing import Dict, Any, Optional
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Iterable, List, Optional
 import math
 
+# Emsal harici kazanımlar (Müteahhit Matematiği varsayımları)
+ORTAK_ALAN_FAKTORU = 0.30  # Yangın merdiveni, asansör, vb.
+BALKON_FAKTORU = 0.10
+
+
+@dataclass(frozen=True)
+class ZoningEnvelope:
+    """
+    İmar zarfı: yasal emsal hakkı, taban oturumu ve brüt inşaat alanı (m²).
+    """
+    arsa_m2: float
+    yasal_emsal_alani: float
+    taban_oturumu: float
+    kat_adedi: float
+    toplam_insaat_alani: float
+
+
+def zoning_envelope(arsa_m2: float, emsal: float, taks: float = 0, kat_adedi: float = 0,
+                    bonus_factor: float = 1.30) -> ZoningEnvelope:
+    """
+    Yasal emsal, taban oturumu ve emsal harici alan dahil brüt inşaat alanını hesaplar.
+
+    Taban oturumu TAKS ile sınırlıdır; kat adedi verilmişse emsal / kat adedinden
+    büyük olamaz (basitleştirilmiş çekme mesafesi kısıtı).
+    """
+    yasal_alan = arsa_m2 * emsal
+    taban_taks = arsa_m2 * taks
+    taban_kat = yasal_alan / kat_adedi if kat_adedi > 0 else taban_taks
+    return ZoningEnvelope(
+        arsa_m2=arsa_m2,
+        yasal_emsal_alani=yasal_alan,
+        taban_oturumu=min(taban_taks, taban_kat),
+        kat_adedi=kat_adedi,
+        toplam_insaat_alani=yasal_alan * bonus_factor,
+    )
+
+
+@dataclass(frozen=True)
+class ZoningFeasibility:
+    """
+    Deterministik imar fizibilitesi (KnowledgeBase.feasibility çıktısı).
+    """
+    zarf: ZoningEnvelope
+    balkonlar_toplam: float
+    ortak_alanlar: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def to_report(self) -> Dict[str, Any]:
+        """Eski (metin biçimli) rapor sözlüğü."""
+        zarf = self.zarf
+        return {
+            "yasal_emsal_hakki": f"{zarf.yasal_emsal_alani:.2f} m²",
+            "taban_oturumu": f"{zarf.taban_oturumu:.2f} m²",
+            "toplam_kat_sayisi": str(zarf.kat_adedi),
+            "emsal_harici_kazanimlar": {
+                "balkonlar_toplam": f"{self.balkonlar_toplam:.2f} m² (~%10)",
+                "ortak_alanlar": f"{self.ortak_alanlar:.2f} m² (Yangın merdiveni, asansör, vb.)",
+                "bodrum_depo_vb": "Yönetmeliğe göre değişir (Analiz edilmeli)"
+            },
+            "toplam_insaat_alani_brut": f"{zarf.toplam_insaat_alani:.2f} m² (Satılabilir Tahmini)",
+            "ozet_yorum": "Hesaplama 'Müteahhit Matematiği' modülü ile simüle edilmiştir. Gerçek rapor için LLM API anahtarı gereklidir."
+        }
+
+
+def zoning_feasibility(arsa_m2: float, emsal: float, taks: float = 0, kat_adedi: float = 0) -> ZoningFeasibility:
+    envelope = zoning_envelope(
+        arsa_m2, emsal, taks, kat_adedi,
+        bonus_factor=1 + ORTAK_ALAN_FAKTORU + BALKON_FAKTORU
+    )
+    return ZoningFeasibility(
+        zarf=envelope,
+        balkonlar_toplam=envelope.yasal_emsal_alani * BALKON_FAKTORU,
+        ortak_alanlar=envelope.yasal_emsal_alani * ORTAK_ALAN_FAKTORU,
+    )
+
+
+def zoning_feasibility_batch(parcels: Iterable[Dict[str, Any]]) -> List[ZoningFeasibility]:
+    """
+    Çok sayıda parsel için zoning_feasibility.
+    Parsel sözlükleri: arsa_m2, emsal_orani, taks_orani, kat_adedi.
+    """
+    return [
+        zoning_feasibility(
+            float(p.get('arsa_m2', 0)),
+            float(p.get('emsal_orani', 0)),
+            float(p.get('taks_orani', 0)),
+            float(p.get('kat_adedi', 0)),
+        )
+        for p in parcels
+    ]
+
+
+# ConstructionCalculator.get_report() sürümü: hesaplama veya rapor biçimi değişince artırılır,
+# böylece Feasibilities'te saklanan eski raporlar yeniden kullanılmaz (persistence.input_hash).
+REPORT_VERSION = 1
+
+
 class ConstructionCalculator:
     """
     Türkiye 'Kat Karşılığı İnşaat' Modeli için Feasibility Engine.
@@ -53,8 +153,9 @@ class ConstructionCalculator:
 
     def calculate_physical_properties(self):
         # 1. Toplam İnşaat Alanı (Müteahhit Brütü)
-        yasal_alan = self.arsa_m2 * self.emsal
-        toplam_insaat_alani = yasal_alan * self.bonus_factor
+        zarf = zoning_envelope(self.arsa_m2, self.emsal, bonus_factor=self.bonus_factor)
+        yasal_alan = zarf.yasal_emsal_alani
+        toplam_insaat_alani = zarf.toplam_insaat_alani
         
         # 2. Daire Sayısı Simülasyonu
         # Toplam alandan yaklaşık daire sayısı (Tam sayı)
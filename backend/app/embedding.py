@@ -0,0 +1,91 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Sequence
+
+# Micro-batching defaults (override via environment)
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+
+
+class BatchingEmbedder:
+    """
+    In-process micro-batching embedder.
+
+    Concurrent `embed()` calls are collected for at most `max_wait_ms` (or until
+    `max_batch_size` texts are waiting), embedded as a single batch in a worker
+    thread and fanned back out to the callers through asyncio futures.
+    """
+
+    def __init__(self,
+                 embed_fn: Callable[[List[str]], Sequence[Sequence[float]]],
+                 max_batch_size: int = EMBED_MAX_BATCH,
+                 max_wait_ms: float = EMBED_MAX_WAIT_MS):
+        """
+        Args:
+            embed_fn: Batch embedding function (e.g. Chroma's DefaultEmbeddingFunction).
+            max_batch_size (int): Upper bound of texts per model call.
+            max_wait_ms (float): How long the first request of a batch may wait for company.
+        """
+        if max_batch_size <= 0: raise ValueError("max_batch_size pozitif olmalıdır.")
+        if max_wait_ms < 0: raise ValueError("max_wait_ms negatif olamaz.")
+
+        self.embed_fn = embed_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._pending = []
+        self._timer = None
+        self._tasks = set()  # strong references to running batches (the loop keeps only weak ones)
+        # One model call at a time; requests arriving meanwhile form the next batch.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedder")
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embeds a single text, sharing the model call with concurrent requests.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush, loop)
+
+        return await future
+
+    async def embed_many(self, texts: Sequence[str]) -> List[List[float]]:
+        return list(await asyncio.gather(*(self.embed(text) for text in texts)))
+
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            task = loop.create_task(self._run_batch(loop, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, loop: asyncio.AbstractEventLoop, batch: list):
+        texts = [text for text, _ in batch]
+        try:
+            vectors = list(await loop.run_in_executor(self._executor, self.embed_fn, texts))
+            if len(vectors) != len(batch):
+                raise ValueError(f"Embedding fonksiyonu {len(batch)} metin için {len(vectors)} vektör döndürdü.")
+            results = [[float(x) for x in vector] for vector in vectors]
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(batch, results):
+            if not future.done():
+                future.set_result(vector)
+
+    def close(self):
+        self._executor.shutdown(wait=False)
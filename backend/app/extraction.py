@@ -0,0 +1,402 @@
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .lexical import tr_lower
+
+# Bump when the rules change: cached fields of older versions are re-extracted
+EXTRACTOR_VERSION = 2
+
+# Fields below this confidence are reported in `low_confidence` and kept out of the payload
+MIN_CONFIDENCE = 0.6
+
+# StrictCalculationRequest fields without a default value
+REQUIRED_REQUEST_FIELDS = ("arsa_m2", "emsal", "kat_karsiligi_orani", "insaat_maliyeti_m2", "satis_fiyati_m2")
+
+# StrictCalculationRequest defaults, applied when the pipeline calls ConstructionCalculator directly
+REQUEST_DEFAULTS = {"ortalama_daire_brutu": 100, "bonus_factor": 1.30, "kat_adedi": 5}
+
+# Document field -> StrictCalculationRequest field
+PAYLOAD_FIELDS = {"arsa_m2": "arsa_m2", "emsal": "emsal", "kat_adedi": "kat_adedi"}
+
+# Plausible ranges; values outside are kept with a heavily reduced confidence
+VALID_RANGES = {
+    "arsa_m2": (10, 10_000_000),
+    "emsal": (0.05, 10),
+    "taks": (0.01, 1),
+    "kat_adedi": (1, 60),
+    "hmax": (2, 300),
+    "on_bahce": (0, 50),
+    "yan_bahce": (0, 50),
+    "arka_bahce": (0, 50),
+}
+
+# OCR often drops Turkish diacritics ("yuzolcumu", "on bahce"); every pattern accepts both forms.
+# "i" also matches "ı": tr_lower maps an ASCII "I" to "ı", so "KAT ADEDI" arrives as "kat adedı".
+_DIACRITICS = {"ö": "[öo]", "ü": "[üu]", "ç": "[çc]", "ş": "[şs]", "ı": "[ıi]", "i": "[iı]", "ğ": "[ğg]"}
+
+# "1.250,50" / "1250,5" / "0.30" / "1,50"
+_NUM = r"(\d{1,3}(?:\.\d{3})+(?:,\d+)?|\d+(?:[.,]\d+)?)"
+_SEP = r"\s*[:=]?\s*"
+
+
+def _tr(label: str) -> str:
+    parts = []
+    for ch in label:
+        if ch == " ":
+            parts.append(r"\s*")
+        else:
+            parts.append(_DIACRITICS.get(ch, re.escape(ch)))
+    return "".join(parts)
+
+
+def _labels(*labels: str) -> str:
+    return "(?:" + "|".join(_tr(label) for label in labels) + ")"
+
+
+# field -> [(compiled pattern, base confidence, value kind)]
+# kind: "ratio" (no thousands separators), "area" (thousands allowed), "int", "percent_ratio"
+_RULES: Dict[str, List[Tuple[re.Pattern, float, str]]] = {
+    "arsa_m2": [
+        (re.compile(r"\b" + _labels("yüzölçümü", "yüzölçüm", "parsel alanı", "arsa alanı", "tapu alanı") + _SEP + _NUM), 0.95, "area"),
+        (re.compile(r"\b" + _labels("alanı", "alan") + r"\s*[:=]\s*" + _NUM + r"\s*m\s*[2²]"), 0.7, "area"),
+    ],
+    "emsal": [
+        (re.compile(r"\b" + _labels("emsal", "kaks", "k.a.k.s") + r"\.?\s*(?:\(\s*kaks\s*\))?" + _SEP + _NUM), 0.95, "ratio"),
+        (re.compile(r"\be\s*[:=]\s*" + _NUM), 0.75, "ratio"),
+        (re.compile(r"\bemsal\D{1,25}?" + _NUM), 0.6, "ratio"),
+    ],
+    "taks": [
+        (re.compile(r"\b" + _labels("taks", "t.a.k.s", "taban alanı katsayısı") + r"\.?" + _SEP + r"(%)?\s*" + _NUM), 0.95, "percent_ratio"),
+    ],
+    "kat_adedi": [
+        (re.compile(r"\b" + _labels("kat adedi", "kat sayısı", "kat adet", "bina kat adedi") + _SEP + r"(\d{1,2})\b"), 0.95, "int"),
+        (re.compile(r"\b(\d{1,2}) ?kat(?:lı|li)?\b"), 0.6, "int"),
+    ],
+    "hmax": [
+        (re.compile(r"\b(?:h\s*max|" + _labels("yençok", "yükseklik") + r")" + _SEP + _NUM + r"\s*m\b"), 0.9, "ratio"),
+    ],
+    "on_bahce": [
+        (re.compile(r"\b" + _labels("ön bahçe", "ön bahçe mesafesi", "ön çekme") + _SEP + _NUM), 0.9, "ratio"),
+    ],
+    "yan_bahce": [
+        (re.compile(r"\b" + _labels("yan bahçe", "yan bahçe mesafesi", "yan çekme") + _SEP + _NUM), 0.9, "ratio"),
+    ],
+    "arka_bahce": [
+        (re.compile(r"\b" + _labels("arka bahçe", "arka bahçe mesafesi", "arka çekme") + _SEP + _NUM), 0.9, "ratio"),
+    ],
+    "ada": [
+        (re.compile(r"\bada\s*(?:no)?\.?" + _SEP + r"(\d{1,6})\b"), 0.9, "int"),
+    ],
+    "parsel": [
+        (re.compile(r"(?<!/)\bparsel\s*(?:no)?\.?" + _SEP + r"(\d{1,6})\b"), 0.9, "int"),
+    ],
+}
+
+# "Ön/Yan/Arka bahçe: 5/3/3" in one line
+_SETBACK_TRIPLE_RE = re.compile(
+    _tr("ön") + r"\s*/\s*yan\s*/\s*arka(?:\s*" + _labels("bahçe") + r")?(?:\s*" + _labels("mesafeleri") + r")?"
+    + _SEP + _NUM + r"\s*/\s*" + _NUM + r"\s*/\s*" + _NUM
+)
+# "Ada/Parsel: 111/4"
+_ADA_PARSEL_RE = re.compile(r"\bada\s*/\s*parsel(?:\s*no)?" + _SEP + r"(\d{1,6})\s*/\s*(\d{1,6})\b")
+_SPACE_RE = re.compile(r"[ \t]+")
+
+
+def parse_tr_number(raw: str, thousands: bool = True) -> float:
+    """
+    Türkçe sayı biçimini çözer: "1.250,50" -> 1250.5, "1,50" -> 1.5, "0.30" -> 0.3.
+    thousands=False ise tek nokta her zaman ondalık ayırıcıdır (oranlar: "1.500" -> 1.5).
+    """
+    raw = raw.strip()
+    if "," in raw and "." in raw:
+        if raw.rfind(",") > raw.rfind("."):
+            raw = raw.replace(".", "").replace(",", ".")
+        else:
+            raw = raw.replace(",", "")
+    elif "," in raw:
+        raw = raw.replace(",", ".")
+    elif "." in raw and thousands and re.fullmatch(r"\d{1,3}(?:\.\d{3})+", raw):
+        raw = raw.replace(".", "")
+    return float(raw)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Türkçe küçük harf, tek boşluk, "m²" -> "m2".
+    """
+    text = tr_lower(text).replace("m²", "m2")
+    return _SPACE_RE.sub(" ", text)
+
+
+@dataclass(frozen=True)
+class ExtractedField:
+    value: float
+    confidence: float
+    source: str
+
+
+@dataclass(frozen=True)
+class ExtractionResult:
+    """
+    Fields read from one imar durumu / tapu text with a confidence in [0, 1] each.
+    """
+    fields: Dict[str, ExtractedField] = field(default_factory=dict)
+
+    def value(self, name: str, default: Any = None) -> Any:
+        extracted = self.fields.get(name)
+        return extracted.value if extracted is not None else default
+
+    @property
+    def low_confidence(self) -> List[str]:
+        return [name for name, f in self.fields.items() if f.confidence < MIN_CONFIDENCE]
+
+    def to_payload(self, defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        StrictCalculationRequest-compatible dict. Financial inputs (kat karşılığı oranı,
+        maliyet, satış fiyatı) are not on the document and come from `defaults`.
+        """
+        payload = dict(defaults or {})
+        for name, request_field in PAYLOAD_FIELDS.items():
+            extracted = self.fields.get(name)
+            if extracted is not None and extracted.confidence >= MIN_CONFIDENCE:
+                payload[request_field] = int(extracted.value) if request_field == "kat_adedi" else extracted.value
+        return payload
+
+    def missing(self, defaults: Optional[Dict[str, Any]] = None) -> List[str]:
+        payload = self.to_payload(defaults)
+        return [name for name in REQUIRED_REQUEST_FIELDS if name not in payload]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": EXTRACTOR_VERSION,
+            "fields": {name: asdict(f) for name, f in self.fields.items()},
+            "low_confidence": self.low_confidence,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional["ExtractionResult"]:
+        """
+        Rebuilds a cached result; None if it was produced by another extractor version.
+        """
+        if not data or data.get("version") != EXTRACTOR_VERSION:
+            return None
+        return cls({name: ExtractedField(**f) for name, f in data.get("fields", {}).items()})
+
+
+def _convert(name: str, kind: str, groups: Tuple[str, ...]) -> Tuple[float, float]:
+    """
+    Match groups -> (value, confidence multiplier).
+    """
+    if kind == "percent_ratio":
+        percent, raw = groups
+        value = parse_tr_number(raw, thousands=False)
+        if percent or value > 1:
+            return value / 100, 0.95
+        return value, 1.0
+    if kind == "int":
+        return float(int(groups[-1])), 1.0
+    return parse_tr_number(groups[-1], thousands=(kind == "area")), 1.0
+
+
+def _in_range(name: str, value: float) -> bool:
+    bounds = VALID_RANGES.get(name)
+    return bounds is None or bounds[0] <= value <= bounds[1]
+
+
+def extract_fields(text: str) -> ExtractionResult:
+    """
+    OCR metninden emsal, TAKS, kat adedi, çekme mesafeleri, arsa alanı ve ada/parsel okur.
+
+    Each field keeps its best candidate: the strongest rule wins, agreeing repeats raise
+    the confidence, disagreeing values and implausible ranges lower it.
+    """
+    normalized = normalize_text(text)
+    candidates: Dict[str, List[Tuple[float, float, str]]] = {}
+
+    # Combined formats first; single-field rules must not re-read their parts
+    # ("ön/yan/arka bahçe: 5/3/3" contains "arka bahçe: 5")
+    combined_spans = []
+    for match in _SETBACK_TRIPLE_RE.finditer(normalized):
+        combined_spans.append(match.span())
+        for name, raw in zip(("on_bahce", "yan_bahce", "arka_bahce"), match.groups()):
+            candidates.setdefault(name, []).append((parse_tr_number(raw, thousands=False), 0.85, match.group(0).strip()))
+    for match in _ADA_PARSEL_RE.finditer(normalized):
+        combined_spans.append(match.span())
+        for name, raw in zip(("ada", "parsel"), match.groups()):
+            candidates.setdefault(name, []).append((float(int(raw)), 0.9, match.group(0).strip()))
+
+    for name, rules in _RULES.items():
+        seen = set()  # a weaker rule matching at the same place is the same evidence
+        for pattern, base, kind in rules:
+            for match in pattern.finditer(normalized):
+                if match.start() in seen or any(start <= match.start() < end for start, end in combined_spans):
+                    continue
+                seen.add(match.start())
+                try:
+                    value, factor = _convert(name, kind, match.groups())
+                except ValueError:
+                    continue
+                candidates.setdefault(name, []).append((value, base * factor, match.group(0).strip()))
+
+    fields = {}
+    for name, found in candidates.items():
+        by_value: Dict[float, List[Tuple[float, str]]] = {}
+        for value, confidence, source in found:
+            if not _in_range(name, value):
+                confidence *= 0.4
+            by_value.setdefault(value, []).append((confidence, source))
+
+        scored = []
+        for value, hits in by_value.items():
+            confidence, source = max(hits)
+            confidence = min(0.99, confidence + 0.05 * (len(hits) - 1))
+            scored.append((confidence, value, source))
+        scored.sort(key=lambda s: -s[0])
+
+        confidence, value, source = scored[0]
+        if any(other[0] >= MIN_CONFIDENCE for other in scored[1:]):
+            confidence *= 0.8  # the document states conflicting values
+        fields[name] = ExtractedField(value=value, confidence=round(confidence, 3), source=source)
+
+    return ExtractionResult(fields)
+
+
+def extract_many(texts: Iterable[str]) -> List[ExtractionResult]:
+    """
+    extract_fields() for many documents (patterns are compiled once at import).
+    """
+    return [extract_fields(text) for text in texts]
+
+
+# ---------- OCR -> extraction -> feasibility ----------
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp")
+
+
+async def extract_from_ocr(result) -> ExtractionResult:
+    """
+    Fields of an OcrResult; reuses the fields stored in the OCR cache and fills them in otherwise.
+    """
+    import asyncio
+    import sqlite3
+    from .ocr_cache import get_cache
+
+    cached = ExtractionResult.from_dict(result.fields) if result.fields else None
+    if cached is not None:
+        return cached
+
+    extraction = extract_fields(result.text)
+    if result.sha256:
+        try:
+            cache = await asyncio.to_thread(get_cache)
+            await asyncio.to_thread(cache.set_fields, result.sha256, extraction.to_dict())
+        except (sqlite3.Error, OSError):
+            pass  # a full or locked cache must not fail an extraction that already succeeded
+    return extraction
+
+
+async def _process_document(name: str, data, defaults: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    import asyncio
+    from .calculator import ConstructionCalculator
+    from .vision import VisionEngine
+
+    # Every failure stays in this document's entry; one bad scan must not end the batch
+    entry: Dict[str, Any] = {"file": name}
+    try:
+        if callable(data):
+            data = await asyncio.to_thread(data)
+        ocr = await VisionEngine.analyze(data)
+        del data
+
+        extraction = await extract_from_ocr(ocr)
+        payload = extraction.to_payload(defaults)
+        entry.update({
+            "sha256": ocr.sha256,
+            "cached": ocr.cached,
+            "fields": extraction.to_dict()["fields"],
+            "low_confidence": extraction.low_confidence,
+            "payload": payload,
+            "missing": extraction.missing(defaults),
+        })
+        if not entry["missing"]:
+            entry["report"] = ConstructionCalculator(**{**REQUEST_DEFAULTS, **payload}).get_report()
+    except Exception as e:
+        entry["error"] = str(e)
+    return entry
+
+
+async def process_documents(images: Iterable[Tuple[str, Any]],
+                            defaults: Optional[Dict[str, Any]] = None,
+                            concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    (name, image bytes) -> OCR (process pool, cached) -> fields -> ConstructionCalculator report.
+    Documents with missing or low-confidence required values get no report, only the reason.
+
+    `images` is consumed lazily by `concurrency` (default OCR_MAX_CONCURRENCY) workers, and the
+    data may be a zero-argument callable returning the bytes (read only when a worker takes it),
+    so at most `concurrency` images are in memory regardless of the batch size.
+    Results keep the input order.
+    """
+    import asyncio
+    from .vision import OCR_MAX_CONCURRENCY
+
+    pending = iter(enumerate(images))
+    results: Dict[int, Dict[str, Any]] = {}
+
+    async def worker():
+        # next() has no await inside, so the workers never take the same item
+        for index, (name, data) in pending:
+            results[index] = await _process_document(name, data, defaults)
+            del data
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency or OCR_MAX_CONCURRENCY))))
+    return [results[index] for index in sorted(results)]
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def process_folder(folder: str, defaults: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    process_documents() over every scan in a folder (sorted by name); each file is read
+    only when its turn comes.
+    """
+    import os
+    from functools import partial
+
+    names = sorted(n for n in os.listdir(folder) if n.lower().endswith(IMAGE_EXTENSIONS))
+    return await process_documents(
+        ((name, partial(_read_file, os.path.join(folder, name))) for name in names), defaults
+    )
+
+
+if __name__ == "__main__":
+    # Usage: python -m app.extraction <klasör> --kat-karsiligi 0.5 --maliyet 25000 --satis 60000
+    import argparse
+    import asyncio
+    import json
+
+    from .vision import shutdown
+
+    parser = argparse.ArgumentParser(description="OCR -> imar alanları -> fizibilite (klasör)")
+    parser.add_argument("folder")
+    parser.add_argument("--kat-karsiligi", type=float, help="kat_karsiligi_orani (0.50 = %%50)")
+    parser.add_argument("--maliyet", type=float, help="insaat_maliyeti_m2")
+    parser.add_argument("--satis", type=float, help="satis_fiyati_m2")
+    parser.add_argument("--daire", type=float, help="ortalama_daire_brutu")
+    args = parser.parse_args()
+
+    defaults = {key: value for key, value in {
+        "kat_karsiligi_orani": args.kat_karsiligi,
+        "insaat_maliyeti_m2": args.maliyet,
+        "satis_fiyati_m2": args.satis,
+        "ortalama_daire_brutu": args.daire,
+    }.items() if value is not None}
+
+    try:
+        for entry in asyncio.run(process_folder(args.folder, defaults)):
+            print(json.dumps(entry, ensure_ascii=False))
+    finally:
+        shutdown()
@@ -0,0 +1,136 @@
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Türkçe büyük/küçük harf dönüşümü: str.lower() 'I' -> 'i' ve 'İ' -> 'i̇' üretir.
+_TR_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+
+# "111/4", "1/1000", "E-5" gibi ada/parsel ve plan kodları tek token olarak da tutulur.
+_TOKEN_RE = re.compile(r"\w+(?:[/.\-]\w+)*")
+_SPLIT_RE = re.compile(r"[/.\-]")
+
+# Açıkça sözcüksel (lexical) sorgular: madde numarası, ada/parsel kodu, tırnaklı ifade.
+_LEXICAL_QUERY_RE = re.compile(
+    r"(\bmadde\s*\d+)|(\b\d+\s*/\s*\d+\b)|(\bada\s*\d+)|(\bparsel\s*\d+)|(\"[^\"]+\")",
+    re.IGNORECASE,
+)
+
+
+def tr_lower(text: str) -> str:
+    """
+    Türkçe kurallarıyla küçük harf ("IŞIK" -> "ışık", "İMAR" -> "imar").
+    """
+    return text.translate(_TR_LOWER).lower()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Türkçe uyumlu küçük harfe çevirip tokenlara ayırır.
+    Bileşik kodlar ("111/4") hem bütün hem de parçaları olarak döner.
+    """
+    tokens = []
+    for match in _TOKEN_RE.findall(tr_lower(text)):
+        tokens.append(match)
+        if _SPLIT_RE.search(match):
+            tokens.extend(part for part in _SPLIT_RE.split(match) if part)
+    return tokens
+
+
+def is_lexical_query(question: str) -> bool:
+    """
+    Sorgu madde numarası, ada/parsel kodu veya tırnaklı ifade içeriyorsa
+    embedding modeline gerek yoktur; BM25 tek başına yeterlidir.
+    """
+    return bool(_LEXICAL_QUERY_RE.search(question))
+
+
+class LexicalIndex:
+    """
+    Chunk'lar üzerinde artımlı güncellenebilen BM25 ters indeksi (inverted index).
+
+    Postings listesi: token -> {doc_id: tf}. Sorgu maliyeti sadece sorgu
+    tokenlarını içeren dokümanlarla orantılıdır.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_lengths: Dict[str, int] = {}
+        self.documents: Dict[str, str] = {}
+        self.total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.doc_lengths
+
+    def add(self, ids: Iterable[str], documents: Iterable[str]):
+        """
+        Yeni chunk'ları indekse ekler. Aynı id tekrar gelirse önce eskisi silinir.
+        """
+        with self._lock:
+            for doc_id, text in zip(ids, documents):
+                if doc_id in self.doc_lengths:
+                    self._remove(doc_id)
+                tokens = tokenize(text)
+                term_freqs: Dict[str, int] = defaultdict(int)
+                for token in tokens:
+                    term_freqs[token] += 1
+                for token, tf in term_freqs.items():
+                    self.postings[token][doc_id] = tf
+                self.doc_lengths[doc_id] = len(tokens)
+                self.documents[doc_id] = text
+                self.total_length += len(tokens)
+
+    def _remove(self, doc_id: str):
+        for token in set(tokenize(self.documents[doc_id])):
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[token]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        del self.documents[doc_id]
+
+    def search(self, query: str, n_results: int = 3) -> List[Tuple[str, float]]:
+        """
+        BM25 skoruna göre en iyi n_results dokümanı (doc_id, skor) olarak döndürür.
+        """
+        with self._lock:
+            n_docs = len(self.doc_lengths)
+            if n_docs == 0:
+                return []
+            avgdl = self.total_length / n_docs or 1.0
+            scores: Dict[str, float] = defaultdict(float)
+            for token in tokenize(query):
+                posting = self.postings.get(token)
+                if not posting:
+                    continue
+                df = len(posting)
+                idf = math.log((n_docs - df + 0.5) / (df + 0.5) + 1)
+                for doc_id, tf in posting.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avgdl)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:n_results]
+
+    def get_document(self, doc_id: str) -> Optional[str]:
+        return self.documents.get(doc_id)
+
+
+def reciprocal_rank_fusion(rankings: Iterable[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Birden fazla sıralamayı Reciprocal Rank Fusion ile birleştirir:
+    skor(d) = Σ 1 / (k + sıra(d)).
+    """
+    fused: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] += 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
@@ -1,7 +1,8 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
+from typing import Optional
 
-import shutil
+import asyncio
 import os
 # from .rag import KnowledgeBase (Moved to lazy load)
 # from .vision import VisionEngine (Moved to lazy load)
@@ -35,6 +36,41 @@ class CalculationResponse(BaseModel):
 
 class QueryRequest(BaseModel):
     question: str
+    n_results: int = 3
+    mode: str = "hybrid"  # "hybrid", "vector" or "lexical"
+
+@app.on_event("startup")
+def warm_up_engines():
+    """
+    Runs once in every worker process. RAG is loaded lazily unless RAG_WARMUP=1.
+    """
+    if os.getenv("RAG_WARMUP", "0") == "1":
+        from .rag import warm_up
+        warm_up()
+
+@app.on_event("startup")
+def start_persistence():
+    """
+    Starts the write-behind flusher for /calculate/strict results (FEASIBILITY_PERSIST=1).
+    """
+    from .persistence import FEASIBILITY_PERSIST, get_store
+    if FEASIBILITY_PERSIST:
+        try:
+            get_store().start()
+        except Exception as e:
+            print(f"[HATA] Fizibilite kalıcılığı başlatılamadı: {e}")
+
+@app.on_event("shutdown")
+def stop_engines():
+    """
+    Stops the OCR worker processes (no-op if the vision pipeline was never used)
+    and flushes queued feasibility results.
+    """
+    from .vision import shutdown
+    shutdown()
+
+    from .persistence import get_store
+    get_store().stop()
 
 @app.get("/")
 def read_root():
@@ -69,26 +105,101 @@ def calculate_basic(req: CalculationRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# --- RAG ENDPOINTS (DISABLED - Heavy dependencies removed) ---
-# Uncomment and install chromadb, sentence-transformers if needed
+# --- RAG ENDPOINTS (upload / query enabled when chromadb + PyMuPDF are installed) ---
 
-# @app.post("/rag/upload")
-# async def upload_document(file: UploadFile = File(...)):
-#     raise HTTPException(status_code=501, detail="RAG features disabled in minimal build")
+@app.post("/rag/upload")
+async def upload_document(request: Request):
+    """
+    Ingests a regulation PDF (multipart field "file" or raw body).
+    The body is streamed into a size-capped spool and hashed on the way in.
+    """
+    from .uploads import UploadTooLarge, receive_upload
 
-# @app.post("/rag/query")
-# def query_knowledge_base(req: QueryRequest):
-#     raise HTTPException(status_code=501, detail="RAG features disabled in minimal build")
+    try:
+        upload = await receive_upload(request)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    with upload:
+        try:
+            from .rag import KnowledgeBase
+            source = upload.filename or upload.sha256[:16]
+            # Small PDFs are parsed from memory, spooled ones from their temp file
+            pdf = upload.getvalue() if upload.in_memory else upload.path
+            chunks = await asyncio.to_thread(KnowledgeBase.ingest_document, pdf, source)
+        except ImportError:
+            raise HTTPException(status_code=501, detail="RAG features disabled in minimal build")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    return {"filename": upload.filename, "size": upload.size, "sha256": upload.sha256, "chunks": chunks}
+
+@app.post("/rag/query")
+async def query_knowledge_base(req: QueryRequest):
+    """
+    Regulation chunks relevant to the question. Concurrent requests share one
+    embedding model call through the micro-batching embedder (KnowledgeBase.aquery).
+    """
+    if req.mode not in ("hybrid", "vector", "lexical"):
+        raise HTTPException(status_code=400, detail="mode: hybrid, vector veya lexical olmalıdır.")
+    if not 1 <= req.n_results <= 50:
+        raise HTTPException(status_code=400, detail="n_results 1 ile 50 arasında olmalıdır.")
+    try:
+        from .rag import KnowledgeBase
+        results = await KnowledgeBase.aquery(req.question, req.n_results, req.mode)
+    except ImportError:
+        raise HTTPException(status_code=501, detail="RAG features disabled in minimal build")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"question": req.question, "results": results}
 
 # @app.post("/rag/feasibility")
 # def generate_feasibility(req: FeasibilityRequest):
 #     raise HTTPException(status_code=501, detail="RAG features disabled in minimal build")
 
-# --- VISION ENDPOINTS (DISABLED - Heavy dependencies removed) ---
+# --- VISION ENDPOINTS (enabled when Pillow + pytesseract are installed) ---
 
-# @app.post("/vision/analyze")
-# async def analyze_image(file: UploadFile = File(...)):
-#     raise HTTPException(status_code=501, detail="Vision features disabled in minimal build")
+@app.post("/vision/analyze")
+async def analyze_image(request: Request):
+    """
+    OCR of a tapu / imar durumu scan (multipart field "file" or raw body) plus the
+    imar fields read from it. Runs in the OCR process pool, so the API stays responsive.
+    """
+    from .uploads import UploadTooLarge, receive_upload
+
+    try:
+        upload = await receive_upload(request)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    with upload:
+        try:
+            from .extraction import extract_from_ocr
+            from .vision import VisionEngine
+            # The hash computed while streaming is the OCR cache key
+            result = await VisionEngine.analyze(upload.getvalue(), digest=upload.sha256)
+            extraction = await extract_from_ocr(result)
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Vision features disabled in minimal build")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except TimeoutError as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    # payload: emsal / arsa_m2 / kat_adedi ready for /calculate/strict (financial inputs still needed)
+    return {
+        "filename": upload.filename,
+        **result.to_dict(),
+        "fields": extraction.to_dict()["fields"],
+        "low_confidence": extraction.low_confidence,
+        "payload": extraction.to_payload(),
+    }
 
 # --- STRICT CALCULATION (KEPT) ---
 
@@ -101,16 +212,21 @@ class StrictCalculationRequest(BaseModel):
     satis_fiyati_m2: float
     bonus_factor: float = 1.30
     kat_adedi: int = 5
+    # Optional: ties the result to a Lands row (stored in Feasibilities, reused for identical inputs)
+    land_id: Optional[int] = None
+    scenario_name: Optional[str] = None
 
 @app.post("/calculate/strict")
 def calculate_strict(req: StrictCalculationRequest):
     """
     Exposes the robust ConstructionCalculator logic.
+    Results are persisted write-behind; identical inputs for the same land_id are served from Feasibilities.
     """
     try:
         from .calculator import ConstructionCalculator
-        
-        calc = ConstructionCalculator(
+        from .persistence import get_store, input_hash
+
+        inputs = dict(
             arsa_m2=req.arsa_m2,
             emsal=req.emsal,
             kat_karsiligi_orani=req.kat_karsiligi_orani,
@@ -120,13 +236,82 @@ def calculate_strict(req: StrictCalculationRequest):
             bonus_factor=req.bonus_factor,
             kat_adedi=req.kat_adedi
         )
-        
+        store = get_store()
+        digest = input_hash(inputs)
+
+        if store.running and req.land_id is not None:
+            cached = store.lookup(req.land_id, digest)
+            if cached is not None:
+                return cached
+
+        calc = ConstructionCalculator(**inputs)
         report = calc.get_report()
+
+        if store.running:
+            maliyet = calc.finansal["toplam_insaat_maliyeti"]
+            store.enqueue(req.land_id, req.scenario_name, inputs, digest, {
+                "toplam_insaat_alani": calc.fiziksel["toplam_insaat_alani"],
+                "toplam_insaat_maliyeti": maliyet,
+                "net_kar": calc.finansal["net_kar"],
+                # 1/3 kuralı: net kâr, inşaat maliyetinin en az üçte biri
+                "is_1_3_rule_compliant": calc.finansal["net_kar"] >= maliyet / 3,
+            }, report)
         return report
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# --- PARCEL SEARCH ---
+
+class ParcelSearchRequest(BaseModel):
+    district: str
+    neighborhood: Optional[str] = None
+    min_area: Optional[float] = None
+    max_area: Optional[float] = None
+    min_emsal: Optional[float] = None
+    # [min_x, min_y, max_x, max_y] (WGS84), LandsRTree ile
+    bbox: Optional[list[float]] = None
+    limit: int = 200
+    with_feasibility: bool = False
+
+@app.post("/parcels/search")
+def search_parcels(req: ParcelSearchRequest):
+    """
+    Candidate parcels by district / area range / minimum emsal (latest ZoningMemory row per neighborhood).
+    with_feasibility adds the zoning_feasibility_batch result of each candidate.
+    """
+    import sqlite3
+    from .parcel_query import find_feasible_parcels, find_parcels
+    from .persistence import MIMAR_DB_PATH
+
+    if req.bbox is not None and len(req.bbox) != 4:
+        raise HTTPException(status_code=400, detail="bbox: [min_x, min_y, max_x, max_y] olmalıdır.")
+    filters = dict(
+        neighborhood=req.neighborhood,
+        min_area=req.min_area,
+        max_area=req.max_area,
+        min_emsal=req.min_emsal,
+        bbox=tuple(req.bbox) if req.bbox is not None else None,
+        limit=req.limit,
+    )
+    try:
+        conn = sqlite3.connect(f"file:{MIMAR_DB_PATH}?mode=ro", uri=True)
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=503, detail=f"Veritabanı açılamadı: {e}")
+    try:
+        if not req.with_feasibility:
+            return {"parcels": find_parcels(conn, req.district, **filters)}
+        return {"parcels": [
+            {**candidate, "feasibility": result.to_dict()}
+            for candidate, result in find_feasible_parcels(conn, req.district, **filters)
+        ]}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except sqlite3.Error as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        conn.close()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,179 @@
+import sqlite3
+
+# Mimar hafıza veritabanı şema geçişleri.
+#
+# Şema sürümü veritabanı başlığındaki PRAGMA user_version'da tutulur; migrate() yalnızca
+# henüz uygulanmamış adımları sırayla çalıştırır, veri silinmez. Yeni bir şema değişikliği
+# MIGRATIONS listesinin SONUNA yeni bir fonksiyon olarak eklenir (mevcut adımlar değiştirilmez).
+
+
+def _columns(conn: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _v1_base_tables(conn: sqlite3.Connection):
+    """
+    Contacts, Lands, ZoningMemory, Feasibilities (init_db.py'nin ilk şeması).
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS Contacts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            full_name TEXT NOT NULL,
+            phone TEXT,
+            email TEXT,
+            role TEXT CHECK(role IN ('Arsa Sahibi', 'Müteahhit', 'Yatırımcı', 'Emlakçı')),
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS Lands (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            owner_id INTEGER,
+            city TEXT DEFAULT 'Çanakkale',
+            district TEXT,
+            neighborhood TEXT,
+            ada TEXT,
+            parsel TEXT,
+            tapu_area_m2 REAL NOT NULL,
+            status TEXT,
+            map_image_path TEXT,
+            FOREIGN KEY (owner_id) REFERENCES Contacts (id) ON DELETE SET NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ZoningMemory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            district TEXT,
+            neighborhood TEXT,
+            zone_type TEXT,
+            emsal_katsayisi REAL,
+            taks_orani REAL,
+            max_height TEXT,
+            plan_note_ref TEXT,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS Feasibilities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            land_id INTEGER,
+            scenario_name TEXT,
+            input_emsal REAL,
+            calculated_total_insaat_m2 REAL,
+            estimated_cost_total REAL,
+            contractor_profit_prediction REAL,
+            is_1_3_rule_compliant BOOLEAN,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (land_id) REFERENCES Lands (id) ON DELETE CASCADE
+        )
+    """)
+
+
+def _v2_feasibility_results(conn: sqlite3.Connection):
+    """
+    /calculate/strict sonuçlarının kalıcılığı: input_hash + report_json, (land_id, input_hash) indeksi.
+    """
+    existing = _columns(conn, "Feasibilities")
+    for column in ("input_hash", "report_json"):
+        if column not in existing:
+            conn.execute(f"ALTER TABLE Feasibilities ADD COLUMN {column} TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_feasibilities_land_hash ON Feasibilities(land_id, input_hash)")
+
+
+def _v3_lookup_indexes(conn: sqlite3.Connection):
+    """
+    Sık kullanılan aramalar için indeksler. Feasibilities.land_id aramaları
+    idx_feasibilities_land_hash'in ilk kolonunu kullanır; ayrı indeks gerekmez.
+    """
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_lands_location ON Lands(district, neighborhood, ada, parsel)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_zoning_location ON ZoningMemory(district, neighborhood)")
+
+
+def _v4_parcel_indexes(conn: sqlite3.Connection):
+    """
+    Parsel sorguları (app/parcel_query.py): LandsRTree (parsel sınır kutuları, R*Tree) ve
+    alan / imar filtreleri için kapsayan (covering) indeksler.
+    """
+    # district + alan aralığı; ada/parsel/mahalle indeksten okunur, tabloya gidilmez
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_lands_district_area
+        ON Lands(district, tapu_area_m2, neighborhood, ada, parsel)
+    """)
+    # Mahallenin en güncel imar kaydı + emsal/TAKS filtresi tek indeks taramasıyla;
+    # (district, neighborhood) öneki idx_zoning_location'ın yerini alır
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_zoning_latest
+        ON ZoningMemory(district, neighborhood, last_updated, emsal_katsayisi, taks_orani, max_height, zone_type)
+    """)
+    conn.execute("DROP INDEX IF EXISTS idx_zoning_location")
+
+    # id = Lands.id; koordinatlar WGS84 (boylam = x, enlem = y)
+    try:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS LandsRTree USING rtree(id, min_x, max_x, min_y, max_y)")
+    except sqlite3.OperationalError as e:
+        # SQLite R*Tree modülü olmadan derlenmiş; sınır kutusu sorguları devre dışı kalır
+        print(f"[BILGI] R*Tree desteklenmiyor, LandsRTree oluşturulmadı: {e}")
+        return
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_lands_rtree_delete AFTER DELETE ON Lands
+        BEGIN
+            DELETE FROM LandsRTree WHERE id = old.id;
+        END
+    """)
+
+
+# Sıra önemlidir: i. eleman user_version = i + 1 sürümüne geçirir.
+MIGRATIONS = [
+    _v1_base_tables,
+    _v2_feasibility_results,
+    _v3_lookup_indexes,
+    _v4_parcel_indexes,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def analyze(conn: sqlite3.Connection):
+    """
+    Sorgu planlayıcı istatistiklerini günceller (online; tablo başına en fazla ~1000 satır örneklenir).
+    """
+    conn.execute("PRAGMA analysis_limit = 1000")  # SQLite < 3.32 bu pragmayı yok sayar
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+def migrate(conn: sqlite3.Connection, target: int = SCHEMA_VERSION) -> int:
+    """
+    Veritabanını `target` sürümüne getirir; her adım kendi transaction'ında çalışır ve
+    user_version aynı transaction'da artırılır (yarım kalan adım geri alınır).
+    Aynı anda başlayan birden fazla süreç güvenlidir: sürüm BEGIN IMMEDIATE kilidi altında
+    yeniden okunur. Adım uygulandıysa sonunda ANALYZE çalışır.
+    Dönüş: uygulanan adım sayısı.
+    """
+    if not 0 <= target <= SCHEMA_VERSION:
+        raise ValueError(f"Geçersiz şema sürümü: {target} (en yüksek {SCHEMA_VERSION}).")
+
+    applied = 0
+    while schema_version(conn) < target:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = schema_version(conn)
+            if version >= target:
+                conn.rollback()
+                break
+            MIGRATIONS[version](conn)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied += 1
+
+    if applied:
+        analyze(conn)
+    return applied
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+# Content-addressed OCR cache (override via environment)
+OCR_CACHE_PATH = os.getenv("OCR_CACHE_PATH", "./backend/db/ocr_cache.sqlite3")
+OCR_CACHE_MAX_MB = float(os.getenv("OCR_CACHE_MAX_MB", "256"))
+
+# Eviction trims to this fraction of the limit, so it does not run on every insert
+EVICT_TO = 0.9
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class OcrCache:
+    """
+    sha256(image bytes) -> OCR text + extracted fields, stored in SQLite.
+
+    The same tapu / plan scans are uploaded again and again for a parcel; a hit skips
+    decoding, preprocessing and tesseract entirely. Total stored bytes are bounded:
+    least recently used entries are evicted once `max_bytes` is exceeded. The running
+    byte total lives in ocr_cache_meta, kept current by triggers in the same transaction
+    as each write, so checking the limit is O(1).
+    The file is shared safely by all API workers (WAL mode).
+    """
+
+    def __init__(self, path: str = OCR_CACHE_PATH, max_bytes: int = int(OCR_CACHE_MAX_MB * 1024 * 1024)):
+        if max_bytes <= 0: raise ValueError("max_bytes pozitif olmalıdır.")
+
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS ocr_cache (
+                sha256 TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                fields TEXT,
+                meta TEXT,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_last_access ON ocr_cache(last_access)")
+        self._db.commit()
+
+        # Byte total; seeded once from existing rows, then maintained by the triggers
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_cache_meta (
+                    id INTEGER PRIMARY KEY CHECK (id = 0),
+                    total_bytes INTEGER NOT NULL
+                )
+            """)
+            self._db.execute(
+                "INSERT OR IGNORE INTO ocr_cache_meta (id, total_bytes) SELECT 0, COALESCE(SUM(size), 0) FROM ocr_cache"
+            )
+            self._db.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_ocr_cache_insert AFTER INSERT ON ocr_cache
+                BEGIN
+                    UPDATE ocr_cache_meta SET total_bytes = total_bytes + new.size WHERE id = 0;
+                END
+            """)
+            self._db.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_ocr_cache_update AFTER UPDATE OF size ON ocr_cache
+                BEGIN
+                    UPDATE ocr_cache_meta SET total_bytes = total_bytes + new.size - old.size WHERE id = 0;
+                END
+            """)
+            self._db.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_ocr_cache_delete AFTER DELETE ON ocr_cache
+                BEGIN
+                    UPDATE ocr_cache_meta SET total_bytes = total_bytes - old.size WHERE id = 0;
+                END
+            """)
+            self._db.commit()
+        except Exception:
+            self._db.rollback()
+            raise
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> Optional[dict]:
+        """
+        Returns {"text", "fields", "meta"} for a content hash, or None. Refreshes its LRU position.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text, fields, meta FROM ocr_cache WHERE sha256 = ?", (digest,)
+            ).fetchone()
+            if row is None:
+                return None
+            with self._db:
+                self._db.execute("UPDATE ocr_cache SET last_access = ? WHERE sha256 = ?", (time.time(), digest))
+
+        text, fields, meta = row
+        return {
+            "text": text,
+            "fields": json.loads(fields) if fields else None,
+            "meta": json.loads(meta) if meta else {},
+        }
+
+    def put(self, digest: str, text: str, fields: Optional[dict] = None, meta: Optional[dict] = None):
+        """
+        Stores (or replaces) the OCR output of an image, then evicts if over the size limit.
+        """
+        fields_json = json.dumps(fields, ensure_ascii=False) if fields is not None else None
+        meta_json = json.dumps(meta or {}, ensure_ascii=False)
+        size = len(text.encode("utf-8")) + len((fields_json or "").encode("utf-8")) + len(meta_json.encode("utf-8"))
+        now = time.time()
+
+        with self._lock:
+            with self._db:
+                # Upsert, not INSERT OR REPLACE: REPLACE's implicit delete does not fire triggers
+                self._db.execute("""
+                    INSERT INTO ocr_cache (sha256, text, fields, meta, size, created_at, last_access)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(sha256) DO UPDATE SET
+                        text = excluded.text, fields = excluded.fields, meta = excluded.meta,
+                        size = excluded.size, created_at = excluded.created_at, last_access = excluded.last_access
+                """, (digest, text, fields_json, meta_json, size, now, now))
+            self._evict()
+
+    def set_fields(self, digest: str, fields: dict) -> bool:
+        """
+        Attaches extracted fields to an existing entry. Returns False if the entry is gone.
+        """
+        fields_json = json.dumps(fields, ensure_ascii=False)
+        with self._lock:
+            row = self._db.execute("SELECT text, meta FROM ocr_cache WHERE sha256 = ?", (digest,)).fetchone()
+            if row is None:
+                return False
+            size = len(row[0].encode("utf-8")) + len(fields_json.encode("utf-8")) + len((row[1] or "").encode("utf-8"))
+            with self._db:
+                self._db.execute(
+                    "UPDATE ocr_cache SET fields = ?, size = ?, last_access = ? WHERE sha256 = ?",
+                    (fields_json, size, time.time(), digest)
+                )
+            self._evict()
+        return True
+
+    def _evict(self):
+        total = self._db.execute("SELECT total_bytes FROM ocr_cache_meta WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * EVICT_TO)
+        victims = []
+        for digest, size in self._db.execute("SELECT sha256, size FROM ocr_cache ORDER BY last_access"):
+            if total <= target:
+                break
+            victims.append((digest,))
+            total -= size
+        with self._db:
+            self._db.executemany("DELETE FROM ocr_cache WHERE sha256 = ?", victims)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0]
+            total = self._db.execute("SELECT total_bytes FROM ocr_cache_meta WHERE id = 0").fetchone()[0]
+        return {"entries": entries, "bytes": total, "max_bytes": self.max_bytes}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # SQLite connections must not cross a fork.
+    global _cache, _cache_lock
+    _cache = None
+    _cache_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_cache() -> OcrCache:
+    """
+    Returns the OCR cache of the current process, opening it on first call.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = OcrCache()
+    return _cache
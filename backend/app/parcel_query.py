@@ -0,0 +1,133 @@
+import re
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .calculator import ZoningFeasibility, zoning_feasibility_batch
+
+# Tek sorguda dönen en fazla aday parsel
+MAX_RESULTS = 1000
+
+# "9.50m / 3 Kat", "3 kat", "B+3 Kat" -> 3
+_KAT_RE = re.compile(r"(\d+)\s*kat", re.IGNORECASE)
+
+# Lands x mahallenin EN GÜNCEL imar kaydı. Lands tarafı idx_lands_district_area ile
+# (district eşitliği + alan aralığı), imar tarafı idx_zoning_latest ile okunur.
+_SELECT_SQL = """
+    SELECT l.id, l.district, l.neighborhood, l.ada, l.parsel, l.tapu_area_m2,
+           z.emsal_katsayisi, z.taks_orani, z.max_height, z.zone_type
+    FROM Lands AS l
+    JOIN ZoningMemory AS z ON z.id = (
+        SELECT z2.id FROM ZoningMemory AS z2
+        WHERE z2.district = l.district AND z2.neighborhood = l.neighborhood
+        ORDER BY z2.last_updated DESC, z2.id DESC
+        LIMIT 1
+    )
+"""
+
+
+def has_rtree(conn: sqlite3.Connection) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'LandsRTree'"
+    ).fetchone() is not None
+
+
+def parse_kat_adedi(max_height: Optional[str]) -> int:
+    """
+    ZoningMemory.max_height metninden kat adedi (bulunamazsa 0: taban oturumu yalnız TAKS ile sınırlanır).
+    """
+    match = _KAT_RE.search(max_height or "")
+    return int(match.group(1)) if match else 0
+
+
+def set_parcel_bboxes(conn: sqlite3.Connection, boxes: Iterable[Tuple[int, float, float, float, float]]) -> int:
+    """
+    Parsel sınır kutularını LandsRTree'ye yazar (varsa üzerine yazar).
+    boxes: (land_id, min_x, min_y, max_x, max_y); WGS84 boylam/enlem.
+    Dönüş: yazılan kutu sayısı.
+    """
+    if not has_rtree(conn):
+        raise ValueError("LandsRTree yok (şema güncel değil veya SQLite R*Tree desteği yok).")
+    rows = []
+    for land_id, min_x, min_y, max_x, max_y in boxes:
+        if min_x > max_x or min_y > max_y:
+            raise ValueError(f"Geçersiz sınır kutusu (land_id={land_id}).")
+        rows.append((land_id, min_x, max_x, min_y, max_y))
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO LandsRTree (id, min_x, max_x, min_y, max_y) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+    return len(rows)
+
+
+def find_parcels(conn: sqlite3.Connection,
+                 district: str,
+                 min_area: Optional[float] = None,
+                 max_area: Optional[float] = None,
+                 min_emsal: Optional[float] = None,
+                 neighborhood: Optional[str] = None,
+                 bbox: Optional[Tuple[float, float, float, float]] = None,
+                 limit: int = MAX_RESULTS) -> List[Dict[str, Any]]:
+    """
+    "district X, tapu_area_m2 A..B arası, emsal >= C" aday parselleri (mahallenin en güncel
+    imar kaydıyla birlikte). bbox (min_x, min_y, max_x, max_y) verilirse yalnızca sınır
+    kutusu kesişen parseller (LandsRTree) döner.
+
+    Her aday zoning_feasibility_batch'e doğrudan verilebilir:
+    arsa_m2, emsal_orani, taks_orani, kat_adedi (+ land_id, ada, parsel, ... bilgi amaçlı).
+    """
+    if min_area is not None and max_area is not None and min_area > max_area:
+        raise ValueError("min_area, max_area'dan büyük olamaz.")
+    if not 0 < limit <= MAX_RESULTS:
+        raise ValueError(f"limit 1 ile {MAX_RESULTS} arasında olmalıdır.")
+
+    where = ["l.district = ?"]
+    params: List[Any] = [district]
+    if neighborhood is not None:
+        where.append("l.neighborhood = ?")
+        params.append(neighborhood)
+    if min_area is not None:
+        where.append("l.tapu_area_m2 >= ?")
+        params.append(min_area)
+    if max_area is not None:
+        where.append("l.tapu_area_m2 <= ?")
+        params.append(max_area)
+    if min_emsal is not None:
+        where.append("z.emsal_katsayisi >= ?")
+        params.append(min_emsal)
+    if bbox is not None:
+        if not has_rtree(conn):
+            raise ValueError("Sınır kutusu sorgusu için LandsRTree gerekli (SQLite R*Tree desteği yok).")
+        min_x, min_y, max_x, max_y = bbox
+        where.append(
+            "l.id IN (SELECT id FROM LandsRTree WHERE max_x >= ? AND min_x <= ? AND max_y >= ? AND min_y <= ?)"
+        )
+        params.extend([min_x, max_x, min_y, max_y])
+
+    sql = f"{_SELECT_SQL} WHERE {' AND '.join(where)} ORDER BY l.tapu_area_m2 DESC, l.id LIMIT ?"
+    params.append(limit)
+
+    candidates = []
+    for land_id, district_, neighborhood_, ada, parsel, area, emsal, taks, max_height, zone_type in conn.execute(sql, params):
+        candidates.append({
+            "land_id": land_id,
+            "district": district_,
+            "neighborhood": neighborhood_,
+            "ada": ada,
+            "parsel": parsel,
+            "zone_type": zone_type,
+            "max_height": max_height,
+            "arsa_m2": area,
+            "emsal_orani": emsal or 0,
+            "taks_orani": taks or 0,
+            "kat_adedi": parse_kat_adedi(max_height),
+        })
+    return candidates
+
+
+def find_feasible_parcels(conn: sqlite3.Connection, district: str, **filters) -> List[Tuple[Dict[str, Any], ZoningFeasibility]]:
+    """
+    find_parcels + zoning_feasibility_batch: [(aday, fizibilite), ...]
+    """
+    candidates = find_parcels(conn, district, **filters)
+    return list(zip(candidates, zoning_feasibility_batch(candidates)))
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+from .calculator import REPORT_VERSION
+from .migrations import migrate
+
+# Mimar hafıza veritabanı (init_db.py ile aynı dosya)
+MIMAR_DB_PATH = os.getenv("MIMAR_DB_PATH", "mimar_memory.db")
+# Varsayılan kapalı: açıkken her API worker'ı MIMAR_DB_PATH'i oluşturur/günceller
+FEASIBILITY_PERSIST = os.getenv("FEASIBILITY_PERSIST", "0") == "1"
+
+# Write-behind ayarları
+PERSIST_BATCH_SIZE = 500
+PERSIST_FLUSH_INTERVAL = 0.5  # saniye
+PERSIST_QUEUE_SIZE = 10000
+
+# Feasibilities kolonları (report_json hariç) insert sırası
+_INSERT_SQL = """
+    INSERT INTO Feasibilities (
+        land_id, scenario_name, input_emsal, calculated_total_insaat_m2, estimated_cost_total,
+        contractor_profit_prediction, is_1_3_rule_compliant, input_hash, report_json
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def input_hash(inputs: Dict[str, Any]) -> str:
+    """
+    Hesaplama girdilerinin kanonik (sıralı JSON) sha256 özeti; aynı senaryo aynı hash'i verir.
+    REPORT_VERSION da özete girer: hesaplayıcı değişince eski raporlar eşleşmez.
+    """
+    payload = {"report_version": REPORT_VERSION, "inputs": inputs}
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class FeasibilityStore:
+    """
+    /calculate/strict sonuçlarının write-behind kalıcılığı.
+
+    Request thread'i sadece kuyruğa ekler (asla beklemez; kuyruk doluysa kayıt düşürülür
+    ve sayılır). Arka plandaki flusher thread'i kayıtları PERSIST_BATCH_SIZE'lık gruplar
+    halinde tek transaction'da Feasibilities tablosuna yazar. Henüz yazılmamış kayıtlar
+    da lookup() ile bulunur.
+    """
+
+    def __init__(self,
+                 db_path: str = MIMAR_DB_PATH,
+                 batch_size: int = PERSIST_BATCH_SIZE,
+                 flush_interval: float = PERSIST_FLUSH_INTERVAL,
+                 max_queue: int = PERSIST_QUEUE_SIZE):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = {}  # (land_id, input_hash) -> report, kuyrukta bekleyenler
+        self._pending_lock = threading.Lock()
+        self._local = threading.local()
+        self._thread = None
+        self._stopping = threading.Event()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        conn = self._connect()
+        try:
+            migrate(conn)
+        finally:
+            conn.close()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="feasibility-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Kuyruktaki her şeyi yazar ve flusher'ı durdurur.
+        """
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    # ---------- request path ----------
+    def enqueue(self, land_id: Optional[int], scenario_name: Optional[str], inputs: Dict[str, Any],
+                digest: str, summary: Dict[str, Any], report: Dict[str, Any]):
+        """
+        Kaydı kuyruğa ekler; hiçbir zaman bloklamaz.
+        """
+        record = (
+            land_id,
+            scenario_name,
+            inputs.get("emsal"),
+            summary.get("toplam_insaat_alani"),
+            summary.get("toplam_insaat_maliyeti"),
+            summary.get("net_kar"),
+            summary.get("is_1_3_rule_compliant"),
+            digest,
+            report,
+        )
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        with self._pending_lock:
+            self._pending[(land_id, digest)] = report
+
+    def lookup(self, land_id: int, digest: str) -> Optional[Dict[str, Any]]:
+        """
+        Aynı arsa + aynı girdiler için daha önce hesaplanmış rapor (yoksa None).
+        """
+        with self._pending_lock:
+            report = self._pending.get((land_id, digest))
+        if report is not None:
+            return report
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        row = conn.execute(
+            "SELECT report_json FROM Feasibilities WHERE land_id = ? AND input_hash = ? "
+            "AND report_json IS NOT NULL ORDER BY id DESC LIMIT 1",
+            (land_id, digest)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # ---------- flusher ----------
+    def _run(self):
+        conn = self._connect()
+        try:
+            while True:
+                try:
+                    first = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    if self._stopping.is_set():
+                        break
+                    continue
+                batch = [first]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                self._flush(conn, batch)
+        finally:
+            conn.close()
+
+    def _flush(self, conn: sqlite3.Connection, batch: list):
+        rows = [record[:-1] + (json.dumps(record[-1], ensure_ascii=False),) for record in batch]
+        try:
+            with conn:
+                conn.executemany(_INSERT_SQL, rows)
+        except sqlite3.Error as e:
+            print(f"[HATA] Fizibilite kayıtları yazılamadı ({len(rows)} kayıt): {e}")
+        finally:
+            with self._pending_lock:
+                for record in batch:
+                    key = (record[0], record[7])
+                    if self._pending.get(key) is record[-1]:
+                        del self._pending[key]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> FeasibilityStore:
+    """
+    Süreç başına tek FeasibilityStore.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FeasibilityStore()
+    return _store
@@ -1,16 +1,186 @@
+import asyncio
+import json
 import os
-import fitz  # PyMuPDF
-import chromadb
-from chromadb.utils import embedding_functions
+import threading
 
-# Initialize ChromaDB Client (Persistent)
-chroma_client = chromadb.PersistentClient(path="./backend/db")
+from .calculator import ZoningFeasibility, zoning_feasibility_batch
+from .embedding import BatchingEmbedder
+from .lexical import LexicalIndex, is_lexical_query, reciprocal_rank_fusion
 
-# Use a default embedding model (all-MiniLM-L6-v2 is standard and efficient)
-default_ef = embedding_functions.DefaultEmbeddingFunction()
+# ChromaDB location (override with RAG_DB_PATH, e.g. per deployment volume)
+RAG_DB_PATH = os.getenv("RAG_DB_PATH", "./backend/db")
+COLLECTION_NAME = "zoning_regulations"
+
+# Vector backend: "chroma" (float32, default) or "quantized" (int8 + mmap, see vector_store.py)
+RAG_VECTOR_BACKEND = os.getenv("RAG_VECTOR_BACKEND", "chroma")
+RAG_QUANTIZED_PATH = os.getenv("RAG_QUANTIZED_PATH", os.path.join(RAG_DB_PATH, "quantized"))
+
+# Number of candidates each retriever contributes to Reciprocal Rank Fusion
+HYBRID_CANDIDATES = 20
+
+
+class _RagState:
+    """
+    Per-process RAG resources: vector store, embedding model and BM25 index.
+
+    Created on first use instead of at import time, so importing this module stays cheap
+    and every forked uvicorn/gunicorn worker builds its own client and model.
+    """
+
+    def __init__(self, db_path: str, backend: str = RAG_VECTOR_BACKEND):
+        from chromadb.utils import embedding_functions
+
+        self.pid = os.getpid()
+        self.db_path = db_path
+        self.backend = backend
+
+        # Use a default embedding model (all-MiniLM-L6-v2 is standard and efficient)
+        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+
+        # Shared micro-batching front of the model for async request handlers
+        self.embedder = BatchingEmbedder(self.embedding_function)
+
+        self.client = None
+        self.collection = None
+        self.quantized_store = None
+        if backend == "quantized":
+            from .vector_store import QuantizedVectorStore
+            self.quantized_store = QuantizedVectorStore(RAG_QUANTIZED_PATH)
+        elif backend == "chroma":
+            import chromadb
+
+            # Initialize ChromaDB Client (Persistent)
+            self.client = chromadb.PersistentClient(path=db_path)
+
+            # Get or create collection
+            self.collection = self.client.get_or_create_collection(
+                name=COLLECTION_NAME, embedding_function=self.embedding_function
+            )
+        else:
+            raise ValueError(f"Bilinmeyen vektör altyapısı: {backend}")
+
+        # BM25 index over the same chunks; synced from the vector store whenever its size changes
+        self.lexical_index = LexicalIndex()
+        self._lexical_count = -1  # chunks in the store at the last sync (-1: never synced)
+        self._lexical_lock = threading.Lock()
+
+    def _stored_count(self) -> int:
+        if self.quantized_store is not None:
+            return len(self.quantized_store)
+        return self.collection.count()
+
+    def ensure_lexical_index(self) -> LexicalIndex:
+        """
+        BM25 index over the chunks in the vector store. Built on first use and topped up
+        whenever the store has grown, e.g. because another worker ingested a document.
+        """
+        if self._stored_count() != self._lexical_count:
+            with self._lexical_lock:
+                if self._stored_count() != self._lexical_count:
+                    self._sync_lexical_index()
+        return self.lexical_index
+
+    def _sync_lexical_index(self):
+        if self.quantized_store is not None:
+            # Rows are append-only: only read the ones added since the last sync
+            start = max(self._lexical_count, 0)
+            ids, documents = self.quantized_store.get_documents(start)
+            self.lexical_index.add(ids, documents)
+            self._lexical_count = start + len(ids)
+            return
+
+        stored_ids = self.collection.get(include=[])["ids"]
+        missing = [doc_id for doc_id in stored_ids if doc_id not in self.lexical_index]
+        if missing:
+            stored = self.collection.get(ids=missing, include=["documents"])
+            self.lexical_index.add(stored["ids"], stored["documents"] or [])
+        self._lexical_count = len(stored_ids)
+
+    def add_chunks(self, ids: list[str], chunks: list[str], metadatas: list[dict]):
+        """
+        Stores chunks in the vector backend and the BM25 index.
+        """
+        if self.quantized_store is not None:
+            embeddings = self.embedding_function(chunks)
+            self.quantized_store.add(ids, embeddings, chunks, metadatas)
+        else:
+            self.collection.add(
+                documents=chunks,
+                metadatas=metadatas,
+                ids=ids
+            )
+        self.ensure_lexical_index()
+
+    def vector_search(self, question: str, n_results: int, embedding: list[float] = None) -> tuple[list[str], list[str]]:
+        """
+        Embedding search. Returns (ids, documents).
+        A precomputed query embedding skips the model call.
+        """
+        if self.quantized_store is not None:
+            if embedding is None:
+                embedding = self.embedding_function([question])[0]
+            ids, documents, _ = self.quantized_store.query(embedding, n_results)
+            return ids, documents
+
+        if embedding is not None:
+            results = self.collection.query(
+                query_embeddings=[embedding],
+                n_results=n_results
+            )
+        else:
+            results = self.collection.query(
+                query_texts=[question],
+                n_results=n_results
+            )
+
+        # Flatten results (results['documents'] is a list of lists)
+        if results['documents']:
+            return results['ids'][0], results['documents'][0]
+        return [], []
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    # The child must never reuse the parent's client, model session or (possibly held) lock.
+    global _state, _state_lock
+    _state = None
+    _state_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_state(db_path: str = None) -> _RagState:
+    """
+    Returns the RAG resources of the current process, creating them on first call.
+    """
+    global _state
+    state = _state
+    if state is None or state.pid != os.getpid():
+        with _state_lock:
+            state = _state
+            if state is None or state.pid != os.getpid():
+                state = _RagState(db_path or RAG_DB_PATH)
+                _state = state
+    return state
+
+
+def warm_up(db_path: str = None):
+    """
+    Explicit warm-up hook: opens the store, loads the embedding model and the BM25 index.
+
+    Call it once per worker after fork (e.g. FastAPI startup event or gunicorn post_fork),
+    so the first user query does not pay the model load.
+    """
+    state = get_state(db_path)
+    state.embedding_function(["ısınma"])
+    state.ensure_lexical_index()
+    return state
 
-# Get or create collection
-collection = chroma_client.get_or_create_collection(name="zoning_regulations", embedding_function=default_ef)
 
 class KnowledgeBase:
     """
@@ -18,11 +188,16 @@ class KnowledgeBase:
     """
 
     @staticmethod
-    def extract_text_from_pdf(pdf_path: str) -> str:
+    def extract_text_from_pdf(pdf_path) -> str:
         """
-        Extracts raw text from a PDF file.
+        Extracts raw text from a PDF file (path, or the raw bytes of an in-memory upload).
         """
-        doc = fitz.open(pdf_path)
+        import fitz  # PyMuPDF
+
+        if isinstance(pdf_path, (bytes, bytearray)):
+            doc = fitz.open(stream=pdf_path, filetype="pdf")
+        else:
+            doc = fitz.open(pdf_path)
         text = ""
         for page in doc:
             text += page.get_text()
@@ -42,9 +217,9 @@ class KnowledgeBase:
         return chunks
 
     @staticmethod
-    def ingest_document(pdf_path: str, source_name: str):
+    def ingest_document(pdf_path, source_name: str):
         """
-        Reads PDF, chunks it, and stores vectors in ChromaDB.
+        Reads PDF (path or bytes), chunks it, and stores vectors in the configured vector backend.
         """
         print(f"Ingesting: {source_name}...")
         text = KnowledgeBase.extract_text_from_pdf(pdf_path)
@@ -53,28 +228,79 @@ class KnowledgeBase:
         ids = [f"{source_name}_{i}" for i in range(len(chunks))]
         metadatas = [{"source": source_name, "chunk_id": i} for i in range(len(chunks))]
         
-        collection.add(
-            documents=chunks,
-            metadatas=metadatas,
-            ids=ids
-        )
+        get_state().add_chunks(ids, chunks, metadatas)
         print(f"Ingestion complete. {len(chunks)} chunks added.")
         return len(chunks)
 
     @staticmethod
-    def query(question: str, n_results: int = 3) -> list[str]:
+    def query(question: str, n_results: int = 3, mode: str = "hybrid") -> list[str]:
         """
         Searches the knowledge base for relevant chunks.
+
+        mode:
+            "hybrid"  -> BM25 + vector results fused with Reciprocal Rank Fusion.
+                         Clearly lexical queries ("Madde 14", "111/4") skip the embedding model.
+            "vector"  -> Pure embedding search.
+            "lexical" -> Pure BM25 search.
+        """
+        if mode == "vector":
+            return KnowledgeBase._vector_search(question, n_results)[1]
+
+        lexical_index = get_state().ensure_lexical_index()
+        lexical_hits = lexical_index.search(question, max(n_results, HYBRID_CANDIDATES))
+
+        if mode == "lexical" or (lexical_hits and is_lexical_query(question)):
+            return [lexical_index.get_document(doc_id) for doc_id, _ in lexical_hits[:n_results]]
+
+        vector_ids, vector_docs = KnowledgeBase._vector_search(question, max(n_results, HYBRID_CANDIDATES))
+        return KnowledgeBase._fuse(lexical_index, lexical_hits, vector_ids, vector_docs, n_results)
+
+    @staticmethod
+    async def aquery(question: str, n_results: int = 3, mode: str = "hybrid") -> list[str]:
+        """
+        Async variant of query() for request handlers.
+        The question is embedded through the shared micro-batching embedder,
+        so concurrent requests share one model call.
         """
-        results = collection.query(
-            query_texts=[question],
-            n_results=n_results
+        state = await asyncio.to_thread(get_state)
+        candidates = n_results if mode == "vector" else max(n_results, HYBRID_CANDIDATES)
+
+        if mode != "vector":
+            lexical_index = await asyncio.to_thread(state.ensure_lexical_index)
+            lexical_hits = lexical_index.search(question, candidates)
+            if mode == "lexical" or (lexical_hits and is_lexical_query(question)):
+                return [lexical_index.get_document(doc_id) for doc_id, _ in lexical_hits[:n_results]]
+
+        embedding = await state.embedder.embed(question)
+        vector_ids, vector_docs = await asyncio.to_thread(
+            KnowledgeBase._vector_search, question, candidates, embedding
         )
-        
-        # Flatten results (results['documents'] is a list of lists)
-        if results['documents']:
-            return results['documents'][0] 
-        return []
+        if mode == "vector":
+            return vector_docs
+        return KnowledgeBase._fuse(lexical_index, lexical_hits, vector_ids, vector_docs, n_results)
+
+    @staticmethod
+    def _fuse(lexical_index, lexical_hits, vector_ids, vector_docs, n_results: int) -> list[str]:
+        """
+        Reciprocal Rank Fusion of the vector and BM25 rankings.
+        """
+        documents = dict(zip(vector_ids, vector_docs))
+        fused = reciprocal_rank_fusion([vector_ids, [doc_id for doc_id, _ in lexical_hits]])
+
+        results = []
+        for doc_id, _ in fused[:n_results]:
+            text = documents.get(doc_id)
+            if text is None:
+                text = lexical_index.get_document(doc_id)
+            results.append(text)
+        return results
+
+    @staticmethod
+    def _vector_search(question: str, n_results: int, embedding: list[float] = None) -> tuple[list[str], list[str]]:
+        """
+        Embedding search in the configured vector backend. Returns (ids, documents).
+        """
+        return get_state().vector_search(question, n_results, embedding)
 
     # Placeholder for actual LLM Generation
     # In a full production app, this would call OpenAI/Anthropic with the retrieved context.
@@ -93,74 +319,24 @@ class KnowledgeBase:
 (Not: Şu an LLM API anahtarı bağlı değil. Yukarıdaki metin Vektör Veritabanından sorunuza en uygun parçalar olarak çekildi.)
 """
 
+    @staticmethod
+    def feasibility(data: dict) -> ZoningFeasibility:
+        """
+        Deterministic 'Developer Math' feasibility as typed data (shared with ConstructionCalculator).
+        """
+        return zoning_feasibility_batch([data])[0]
+
+    @staticmethod
+    def feasibility_batch(parcels: list[dict]) -> list[ZoningFeasibility]:
+        """
+        feasibility() for many parcels in one call.
+        """
+        return zoning_feasibility_batch(parcels)
+
     @staticmethod
     def generate_feasibility_report(data: dict) -> str:
         """
         Generates a detailed feasibility report using the 'Developer Math' logic.
+        Kept for callers that expect a JSON string; prefer feasibility().
         """
-        prompt = f"""
-Aşağıdaki parsel verileri ve Plan Notları referanslarına göre bana detaylı bir inşaat alanı dökümü hazırla.
-
-### GİRDİ VERİLERİ:
-- Arsa Alanı: {data.get('arsa_m2')} m²
-- Emsal (KAKS): {data.get('emsal_orani')}
-- TAKS (Taban Oturumu): {data.get('taks_orani')}
-- Kat Adedi: {data.get('kat_adedi')}
-- Çekme Mesafeleri: Ön {data.get('on_cekme', '-')}, Yan {data.get('yan_cekme', '-')}, Arka {data.get('arka_cekme', '-')}
-
-### HESAPLAMA ADIMLARI (Müteahhit Matematiği):
-1. YASAL EMSAL: Arsa Alanı x Emsal.
-2. TABAN OTURUMU: Arsa x TAKS (veya çekme mesafesi kısıtı).
-3. BONUSLAR: Balkonlar, Çatı Piyesi, Bodrumlar, Ortak Alanlar (%30 ekle).
-
-### ÇIKTI FORMATI:
-{{
-  "yasal_emsal_hakki": "...",
-  "taban_oturumu": "...",
-  "toplam_kat_sayisi": "...",
-  "emsal_harici_kazanimlar": {{
-     "balkonlar_toplam": "...",
-     "ortak_alanlar": "...",
-     "bodrum_depo_vb": "..."
-  }},
-  "toplam_insaat_alani_brut": "...",
-  "ozet_yorum": "..."
-}}
-"""
-        # In a real scenario, this 'prompt' would be sent to GPT-4.
-        # Here, we will perform a mock 'Deterministic' calculation to simulate the result for the user.
-        
-        arsa = float(data.get('arsa_m2', 0))
-        emsal = float(data.get('emsal_orani', 0))
-        taks = float(data.get('taks_orani', 0))
-        kat = float(data.get('kat_adedi', 0))
-        
-        yasal_emsal = arsa * emsal
-        taban_oturumu = arsa * taks
-        
-        # Determine strict footprint (simplified logic)
-        calculated_taban = yasal_emsal / kat if kat > 0 else taban_oturumu
-        final_taban = min(taban_oturumu, calculated_taban)
-        
-        # Bonuses (Developer Math)
-        common_area_factor = 0.30 # %30 bonus
-        balcony_factor = 0.10 # %10 bonus
-        
-        total_brut = yasal_emsal * (1 + common_area_factor + balcony_factor)
-        
-        # Mock JSON Response simulating an LLM
-        import json
-        result = {
-            "yasal_emsal_hakki": f"{yasal_emsal:.2f} m²",
-            "taban_oturumu": f"{final_taban:.2f} m²",
-            "toplam_kat_sayisi": str(kat),
-            "emsal_harici_kazanimlar": {
-                "balkonlar_toplam": f"{(yasal_emsal * balcony_factor):.2f} m² (~%10)",
-                "ortak_alanlar": f"{(yasal_emsal * common_area_factor):.2f} m² (Yangın merdiveni, asansör, vb.)",
-                "bodrum_depo_vb": "Yönetmeliğe göre değişir (Analiz edilmeli)"
-            },
-            "toplam_insaat_alani_brut": f"{total_brut:.2f} m² (Satılabilir Tahmini)",
-            "ozet_yorum": "Hesaplama 'Müteahhit Matematiği' modülü ile simüle edilmiştir. Gerçek rapor için LLM API anahtarı gereklidir."
-        }
-        
-        return json.dumps(result, indent=2, ensure_ascii=False)
+        return json.dumps(KnowledgeBase.feasibility(data).to_report(), indent=2, ensure_ascii=False)
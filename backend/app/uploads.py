@@ -0,0 +1,192 @@
+import hashlib
+import io
+import os
+import tempfile
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Upload limits (override via environment)
+UPLOAD_MAX_MB = float(os.getenv("UPLOAD_MAX_MB", "50"))
+UPLOAD_SPOOL_MB = float(os.getenv("UPLOAD_SPOOL_MB", "8"))
+
+
+class UploadTooLarge(ValueError):
+    """
+    Upload exceeds the configured size cap (HTTP 413).
+    """
+
+
+class SpooledUpload:
+    """
+    Upload body kept in memory up to `spool_bytes`, then rolled over to a named temp file.
+
+    The sha256 and size are computed while the data arrives, so callers (OCR cache,
+    ingestion) never re-read the body just to hash it. Writing past `max_bytes`
+    raises UploadTooLarge.
+    """
+
+    def __init__(self,
+                 filename: str = "",
+                 content_type: str = "",
+                 max_bytes: int = int(UPLOAD_MAX_MB * 1024 * 1024),
+                 spool_bytes: int = int(UPLOAD_SPOOL_MB * 1024 * 1024)):
+        self.filename = filename
+        self.content_type = content_type
+        self.max_bytes = max_bytes
+        self.spool_bytes = spool_bytes
+        self.size = 0
+
+        self._hash = hashlib.sha256()
+        self._file = io.BytesIO()
+        self._path = None
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    @property
+    def in_memory(self) -> bool:
+        return self._path is None
+
+    def write(self, chunk: bytes):
+        if not chunk:
+            return
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(f"Dosya boyutu sınırı aşıldı ({self.max_bytes / (1024 * 1024):g} MB).")
+        self._hash.update(chunk)
+        if self._path is None and self.size > self.spool_bytes:
+            self._rollover()
+        self._file.write(chunk)
+
+    def _rollover(self):
+        suffix = os.path.splitext(self.filename)[1]
+        disk_file = tempfile.NamedTemporaryFile(prefix="upload_", suffix=suffix, delete=False)
+        disk_file.write(self._file.getvalue())
+        self._file = disk_file
+        self._path = disk_file.name
+
+    def getvalue(self) -> bytes:
+        """
+        Whole body as bytes (e.g. for the OCR process pool).
+        """
+        if self._path is None:
+            return self._file.getvalue()
+        self._file.flush()
+        with open(self._path, "rb") as f:
+            return f.read()
+
+    @property
+    def path(self) -> str:
+        """
+        Body as a file on disk, for libraries that only take a path. Spills a small upload on first use.
+        """
+        if self._path is None:
+            self._rollover()
+        self._file.flush()
+        return self._path
+
+    def close(self):
+        self._file.close()
+        if self._path is not None and os.path.exists(self._path):
+            os.unlink(self._path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+async def receive_upload(request,
+                         field_name: str = "file",
+                         max_bytes: int = int(UPLOAD_MAX_MB * 1024 * 1024),
+                         spool_bytes: int = int(UPLOAD_SPOOL_MB * 1024 * 1024)) -> SpooledUpload:
+    """
+    Streams a request body into a SpooledUpload chunk by chunk.
+
+    multipart/form-data: the file part named `field_name` is taken (other parts are ignored).
+    Any other content type: the raw body is the file; its name comes from the
+    X-Filename header or the `filename` query parameter.
+    """
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise UploadTooLarge(f"Dosya boyutu sınırı aşıldı ({max_bytes / (1024 * 1024):g} MB).")
+
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data":
+        upload = SpooledUpload(
+            filename=request.headers.get("x-filename") or request.query_params.get("filename", ""),
+            content_type=content_type.decode("latin-1"),
+            max_bytes=max_bytes,
+            spool_bytes=spool_bytes,
+        )
+        try:
+            async for chunk in request.stream():
+                upload.write(chunk)
+        except Exception:
+            upload.close()
+            raise
+        return upload
+
+    boundary = options.get(b"boundary")
+    if not boundary:
+        raise ValueError("multipart boundary eksik.")
+
+    state = {"field": b"", "value": b"", "headers": {}, "target": None, "upload": None}
+
+    def on_part_begin():
+        state["headers"] = {}
+        state["target"] = None
+
+    def on_header_field(data, start, end):
+        state["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["field"].lower()] = state["value"]
+        state["field"], state["value"] = b"", b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        name = disposition.get(b"name", b"").decode("utf-8", "replace")
+        filename = disposition.get(b"filename")
+        if name == field_name and filename is not None and state["upload"] is None:
+            state["upload"] = state["target"] = SpooledUpload(
+                filename=os.path.basename(filename.decode("utf-8", "replace")),
+                content_type=state["headers"].get(b"content-type", b"").decode("latin-1"),
+                max_bytes=max_bytes,
+                spool_bytes=spool_bytes,
+            )
+
+    def on_part_data(data, start, end):
+        if state["target"] is not None:
+            state["target"].write(data[start:end])
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+    })
+
+    try:
+        async for chunk in request.stream():
+            if chunk:
+                parser.write(chunk)
+        parser.finalize()
+    except Exception:
+        if state["upload"] is not None:
+            state["upload"].close()
+        raise
+
+    if state["upload"] is None:
+        raise ValueError(f"'{field_name}' dosya alanı bulunamadı.")
+    return state["upload"]
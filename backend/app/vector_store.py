@@ -0,0 +1,316 @@
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+
+class QuantizedVectorStore:
+    """
+    Disk-backed vector index for the regulation corpus.
+
+    Layout (one directory):
+        vectors.i8   -> N x D int8 codes (symmetric, per-vector scale), memory-mapped
+        scales.f32   -> N float32 scales
+        vectors.f32  -> N x D float32 originals, memory-mapped, read only for re-ranking
+        chunks.sqlite3 -> row -> (id, document, metadata)
+
+    Search scans the int8 codes block by block, keeps the best `rerank_factor * n`
+    candidates and re-ranks them exactly against the float32 rows. Only the int8 file
+    is touched by a full scan, so the resident set is ~1/4 of a float32 index, and
+    opening the store is just an mmap (no load step).
+
+    Several processes (uvicorn workers) may share one directory: writers serialize on
+    an exclusive lock file, and readers pick up the new row count when meta.json changes.
+    """
+
+    BLOCK_ROWS = 65536
+
+    def __init__(self, path: str, dim: Optional[int] = None, rerank_factor: int = 10):
+        self.path = path
+        self.rerank_factor = rerank_factor
+        os.makedirs(path, exist_ok=True)
+
+        self._meta_path = os.path.join(path, "meta.json")
+        self._codes_path = os.path.join(path, "vectors.i8")
+        self._scales_path = os.path.join(path, "scales.f32")
+        self._floats_path = os.path.join(path, "vectors.f32")
+        self._lock_path = os.path.join(path, "write.lock")
+
+        self.dim = dim
+        self.count = 0
+        self._meta_mtime = None
+
+        self._db = sqlite3.connect(os.path.join(path, "chunks.sqlite3"), check_same_thread=False)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                row INTEGER PRIMARY KEY,
+                id TEXT UNIQUE NOT NULL,
+                document TEXT,
+                metadata TEXT
+            )
+        """)
+        self._lock = threading.Lock()
+        self._maps = None
+        self._refresh()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self.count
+
+    def _refresh(self):
+        """
+        Reloads dim/count if another process rewrote meta.json (caller holds self._lock).
+        """
+        try:
+            mtime = os.stat(self._meta_path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime == self._meta_mtime:
+            return
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dim = meta.get("dim", self.dim)
+        if meta.get("count", 0) != self.count:
+            self.count = meta.get("count", 0)
+            self._maps = None
+        self._meta_mtime = mtime
+
+    @contextmanager
+    def _write_lock(self):
+        # Cross-process: only one writer appends to the files at a time
+        with open(self._lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _file_sizes(self, rows: int) -> List[Tuple[str, int]]:
+        dim = self.dim or 0
+        return [
+            (self._codes_path, rows * dim),
+            (self._scales_path, rows * 4),
+            (self._floats_path, rows * dim * 4),
+        ]
+
+    def _truncate(self, rows: int):
+        # Drops anything past `rows` (left behind by a writer that failed mid-way)
+        for file_path, size in self._file_sizes(rows):
+            if os.path.exists(file_path) and os.path.getsize(file_path) > size:
+                os.truncate(file_path, size)
+
+    # ---------- write path ----------
+    def add(self,
+            ids: Sequence[str],
+            embeddings: Sequence[Sequence[float]],
+            documents: Sequence[str],
+            metadatas: Optional[Sequence[Dict]] = None):
+        """
+        Appends vectors. Ids that already exist (or repeat within the batch) are skipped,
+        same as Chroma's add. The files and the chunks table are either both extended
+        or, on failure, both left as they were.
+        """
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock, self._write_lock():
+            self._meta_mtime = None
+            self._refresh()
+
+            existing = self._existing_ids(ids)
+            keep = []
+            for i, doc_id in enumerate(ids):
+                if doc_id not in existing:
+                    existing.add(doc_id)
+                    keep.append(i)
+            if not keep:
+                return 0
+
+            vectors = np.asarray([embeddings[i] for i in keep], dtype=np.float32)
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Vektör boyutu {vectors.shape[1]}, beklenen {self.dim}.")
+
+            vectors = _normalize(vectors)
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+
+            self._truncate(self.count)
+            try:
+                with open(self._codes_path, "ab") as f:
+                    f.write(codes.tobytes())
+                with open(self._scales_path, "ab") as f:
+                    f.write(scales.astype(np.float32).tobytes())
+                with open(self._floats_path, "ab") as f:
+                    f.write(vectors.tobytes())
+
+                with self._db:
+                    # Rows past `count` belong to a writer that died before updating meta.json
+                    self._db.execute("DELETE FROM chunks WHERE row >= ?", (self.count,))
+                    self._db.executemany(
+                        "INSERT INTO chunks (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                        [(self.count + n, ids[i], documents[i], json.dumps(metadatas[i], ensure_ascii=False))
+                         for n, i in enumerate(keep)]
+                    )
+            except BaseException:
+                self._truncate(self.count)
+                raise
+
+            self.count += len(keep)
+            self._write_meta()
+            self._meta_mtime = os.stat(self._meta_path).st_mtime_ns
+            self._maps = None
+            return len(keep)
+
+    def _existing_ids(self, ids: Sequence[str]) -> set:
+        # Only rows below `count` are live; anything else is a failed writer's leftover
+        found = set()
+        for start in range(0, len(ids), 500):
+            batch = list(ids[start:start + 500])
+            placeholders = ",".join("?" * len(batch))
+            found.update(r[0] for r in self._db.execute(
+                f"SELECT id FROM chunks WHERE row < ? AND id IN ({placeholders})", [self.count] + batch))
+        return found
+
+    def _write_meta(self):
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "count": self.count, "quantization": "int8"}, f)
+        os.replace(tmp_path, self._meta_path)
+
+    # ---------- read path ----------
+    def _mapped(self):
+        maps = self._maps
+        if maps is None:
+            codes = np.memmap(self._codes_path, dtype=np.int8, mode="r", shape=(self.count, self.dim))
+            scales = np.memmap(self._scales_path, dtype=np.float32, mode="r", shape=(self.count,))
+            floats = np.memmap(self._floats_path, dtype=np.float32, mode="r", shape=(self.count, self.dim))
+            maps = self._maps = (codes, scales, floats)
+        return maps
+
+    def query(self, embedding: Sequence[float], n_results: int = 3) -> Tuple[List[str], List[str], List[float]]:
+        """
+        Returns (ids, documents, cosine scores) of the nearest chunks.
+        """
+        with self._lock:
+            self._refresh()
+            if self.count == 0:
+                return [], [], []
+            codes, scales, floats = self._mapped()
+        count = len(scales)
+
+        q = _normalize(np.asarray(embedding, dtype=np.float32)[None, :])[0]
+        n_candidates = min(count, max(n_results * self.rerank_factor, n_results))
+
+        # 1) Approximate scores from int8 codes, block by block (bounded temp memory)
+        approx = np.empty(count, dtype=np.float32)
+        for start in range(0, count, self.BLOCK_ROWS):
+            stop = min(start + self.BLOCK_ROWS, count)
+            approx[start:stop] = (codes[start:stop].astype(np.float32) @ q) * scales[start:stop]
+
+        if n_candidates < count:
+            candidates = np.argpartition(-approx, n_candidates - 1)[:n_candidates]
+        else:
+            candidates = np.arange(count)
+
+        # 2) Exact re-ranking on the float32 rows of the candidates only
+        candidates.sort()
+        exact = floats[candidates] @ q
+        order = np.argsort(-exact, kind="stable")[:n_results]
+        rows = [int(candidates[i]) for i in order]
+        scores = [float(exact[i]) for i in order]
+
+        documents = self._fetch(rows)
+        return [documents[r][0] for r in rows], [documents[r][1] for r in rows], scores
+
+    def _fetch(self, rows: List[int]) -> Dict[int, Tuple[str, str]]:
+        if not rows:
+            return {}
+        placeholders = ",".join("?" * len(rows))
+        return {row: (doc_id, document) for row, doc_id, document in self._db.execute(
+            f"SELECT row, id, document FROM chunks WHERE row IN ({placeholders})", rows)}
+
+    def get_documents(self, start: int = 0) -> Tuple[List[str], List[str]]:
+        """
+        (ids, documents) of rows `start`.. in insertion order, e.g. to build or top up the BM25 index.
+        """
+        with self._lock:
+            self._refresh()
+            count = self.count
+        ids, documents = [], []
+        for doc_id, document in self._db.execute(
+                "SELECT id, document FROM chunks WHERE row >= ? AND row < ? ORDER BY row", (start, count)):
+            ids.append(doc_id)
+            documents.append(document)
+        return ids, documents
+
+    def close(self):
+        self._maps = None
+        self._db.close()
+
+    # ---------- migration / evaluation ----------
+    @classmethod
+    def from_chroma(cls, collection, path: str, batch_size: int = 1000) -> "QuantizedVectorStore":
+        """
+        Builds (or tops up) a quantized store from an existing Chroma collection.
+        """
+        store = cls(path)
+        total = collection.count()
+        for offset in range(0, total, batch_size):
+            batch = collection.get(
+                include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset
+            )
+            store.add(batch["ids"], batch["embeddings"], batch["documents"], batch["metadatas"])
+        return store
+
+
+def measure_recall(store: QuantizedVectorStore, collection, query_embeddings: Sequence[Sequence[float]],
+                   k: int = 10) -> float:
+    """
+    Recall@k of the quantized store against the Chroma collection it was built from.
+    """
+    if not query_embeddings:
+        return 0.0
+    reference = collection.query(query_embeddings=[list(map(float, e)) for e in query_embeddings], n_results=k)
+    hits = 0
+    expected = 0
+    for embedding, truth in zip(query_embeddings, reference["ids"]):
+        found, _, _ = store.query(embedding, k)
+        hits += len(set(found) & set(truth))
+        expected += len(truth)
+    return hits / expected if expected else 0.0
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+if __name__ == "__main__":
+    # Chroma -> quantized store migration and recall report
+    # Usage: python -m app.vector_store [sample_queries]
+    import sys
+    import chromadb
+    from .rag import COLLECTION_NAME, RAG_DB_PATH, RAG_QUANTIZED_PATH
+
+    collection = chromadb.PersistentClient(path=RAG_DB_PATH).get_collection(COLLECTION_NAME)
+    store = QuantizedVectorStore.from_chroma(collection, RAG_QUANTIZED_PATH)
+    print(f"[BASARILI] {len(store)} vektör '{RAG_QUANTIZED_PATH}' altına yazıldı.")
+
+    sample_size = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    sample = collection.get(include=["embeddings"], limit=sample_size)["embeddings"]
+    sample = [] if sample is None else list(sample)
+    print(f"[TEST] Recall@10 (Chroma referans): {measure_recall(store, collection, sample, k=10):.3f}")
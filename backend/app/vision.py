@@ -1,24 +1,333 @@
+import asyncio
+import io
+import multiprocessing
 import os
-# import pytesseract
-# from PIL import Image
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, replace
+from typing import Optional
+
+from .ocr_cache import content_hash, get_cache
+
+# OCR configuration (override via environment)
+OCR_LANG = os.getenv("OCR_LANG", "tur")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+OCR_MAX_CONCURRENCY = int(os.getenv("OCR_MAX_CONCURRENCY", str(OCR_WORKERS * 2)))
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "3000"))
+# Seconds tesseract may spend on one image before it is killed (frees the worker slot)
+OCR_TIMEOUT = float(os.getenv("OCR_TIMEOUT", "120"))
+
+# Deskew search range (degrees) and step; scans of tapu / imar durumu are rarely off by more
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.5
+DESKEW_PROBE_SIDE = 800
+
+
+@dataclass(frozen=True)
+class OcrResult:
+    """
+    OCR output of one image plus the time spent in each pipeline stage (ms).
+    cached=True means it came from the content-hash cache (no OCR was run).
+    """
+    text: str
+    width: int
+    height: int
+    skew_angle: float
+    timings: dict = field(default_factory=dict)
+    sha256: str = ""
+    cached: bool = False
+    fields: Optional[dict] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "text": self.text,
+            "width": self.width,
+            "height": self.height,
+            "skew_angle": self.skew_angle,
+            "timings_ms": self.timings,
+            "sha256": self.sha256,
+            "cached": self.cached,
+            "fields": self.fields,
+        }
+
+
+def require_ocr():
+    """
+    Raises ImportError when the OCR dependencies (Pillow, pytesseract) are missing.
+    """
+    import PIL  # noqa: F401
+    import pytesseract  # noqa: F401
+
+
+# ---------- preprocessing (runs inside the worker processes) ----------
+def _otsu_threshold(histogram: list) -> int:
+    """
+    Otsu threshold of a 256-bin grayscale histogram.
+    """
+    total = sum(histogram)
+    sum_all = sum(i * h for i, h in enumerate(histogram))
+    sum_bg = 0.0
+    weight_bg = 0
+    best_threshold, best_variance = 127, -1.0
+    for t, count in enumerate(histogram):
+        weight_bg += count
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += t * count
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = t, variance
+    return best_threshold
+
+
+def _projection_score(image) -> float:
+    """
+    Sharpness of the horizontal projection profile: text lines aligned with the rows
+    give alternating dark/light row means, i.e. large differences between neighbours.
+    """
+    from PIL import Image
+
+    rows = list(image.resize((1, image.height), Image.BOX).getdata())
+    return float(sum((a - b) ** 2 for a, b in zip(rows, rows[1:])))
+
+
+def _estimate_skew(binary) -> float:
+    """
+    Skew angle (degrees) maximizing the projection score, searched on a small copy.
+    """
+    from PIL import Image
+
+    probe = binary.copy()
+    probe.thumbnail((DESKEW_PROBE_SIDE, DESKEW_PROBE_SIDE), Image.NEAREST)
+
+    best_angle, best_score = 0.0, _projection_score(probe)
+    steps = int(DESKEW_MAX_ANGLE / DESKEW_STEP)
+    for i in range(-steps, steps + 1):
+        angle = i * DESKEW_STEP
+        if angle == 0:
+            continue
+        score = _projection_score(probe.rotate(angle, resample=Image.NEAREST, fillcolor=255))
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+
+def _ocr_pipeline(image_bytes: bytes, lang: str = OCR_LANG, max_side: int = OCR_MAX_SIDE,
+                  timeout: float = OCR_TIMEOUT) -> OcrResult:
+    """
+    decode -> grayscale -> downscale -> binarize (Otsu) -> deskew -> tesseract.
+    Module-level so it can be sent to a ProcessPoolExecutor.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+    import pytesseract
+
+    timings = {}
+    clock = time.perf_counter()
+
+    def lap(stage: str):
+        nonlocal clock
+        now = time.perf_counter()
+        timings[stage] = round((now - clock) * 1000, 2)
+        clock = now
+
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        image.load()
+    except (UnidentifiedImageError, OSError) as e:
+        raise ValueError(f"Görüntü okunamadı: {e}")
+    lap("decode")
+
+    image = ImageOps.exif_transpose(image).convert("L")
+    lap("grayscale")
+
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    lap("downscale")
+
+    threshold = _otsu_threshold(image.histogram())
+    binary = image.point(lambda p: 255 if p > threshold else 0)
+    lap("binarize")
+
+    angle = _estimate_skew(binary)
+    if angle:
+        binary = binary.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+    lap("deskew")
+
+    try:
+        text = pytesseract.image_to_string(binary, lang=lang, timeout=timeout)
+    except RuntimeError as e:
+        # pytesseract reports a killed tesseract process as RuntimeError("Tesseract process timeout")
+        if "timeout" in str(e).lower():
+            raise TimeoutError(f"OCR {timeout:g} saniyede tamamlanamadı.")
+        raise
+    lap("ocr")
+
+    return OcrResult(text=text, width=binary.width, height=binary.height, skew_angle=angle, timings=timings)
+
+
+def _init_worker():
+    # One tesseract thread per worker process; parallelism comes from the pool
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+# ---------- per-process pool ----------
+_pool = None
+_pool_lock = threading.Lock()
+_semaphores = {}
+_inflight = {}  # sha256 -> task of the OCR run other requests for the same image wait on
+
+
+def _reset_after_fork():
+    # A forked API worker must not share the parent's pool or (possibly held) lock.
+    global _pool, _pool_lock, _semaphores, _inflight
+    _pool = None
+    _pool_lock = threading.Lock()
+    _semaphores = {}
+    _inflight = {}
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """
+    Returns the OCR process pool of the current process, creating it on first call.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Not fork: the API worker already runs to_thread / embedder threads
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=context, initializer=_init_worker)
+    return _pool
+
+
+def _discard_pool(broken: ProcessPoolExecutor):
+    # A crashed worker (OOM, segfault) breaks the whole executor; the next get_pool() builds a new one
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False)
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    # Bound to the running event loop (asyncio primitives are loop-specific on 3.9)
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(OCR_MAX_CONCURRENCY)
+    return semaphore
+
+
+def shutdown():
+    """
+    Stops the OCR worker processes (FastAPI shutdown event).
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
 
 class VisionEngine:
     """
     Vision Engine: Handles OCR and Image Analysis.
-    Currently a stub until Tesseract/PaddleOCR is configured.
+    Tesseract (lang="tur") behind a process pool; at most OCR_MAX_CONCURRENCY images
+    are in flight per API worker, further requests wait for a slot.
     """
 
     @staticmethod
     def extract_text_from_image(image_path: str) -> str:
         """
-        Extracts text from an image using OCR.
+        Extracts text from an image using OCR (synchronous, in the calling process).
+        """
+        with open(image_path, "rb") as f:
+            return _ocr_pipeline(f.read()).text
+
+    @staticmethod
+    async def analyze(image_bytes: bytes, use_cache: bool = True, digest: str = None) -> OcrResult:
+        """
+        Runs the OCR pipeline in the process pool without blocking the event loop.
+        timings_ms includes the wait for a concurrency slot ("queue") and the total.
+
+        With use_cache, images are looked up by sha256 first (pass `digest` if it was
+        already computed, e.g. while streaming the upload); concurrent requests for the
+        same image share one OCR run.
+        """
+        started = time.perf_counter()
+        if not use_cache:
+            return await VisionEngine._run_ocr(image_bytes, started)
+
+        digest = digest or content_hash(image_bytes)
+        cache = await asyncio.to_thread(get_cache)
+        hit = await asyncio.to_thread(cache.get, digest)
+        if hit is not None:
+            meta = hit["meta"]
+            elapsed = round((time.perf_counter() - started) * 1000, 2)
+            return OcrResult(
+                text=hit["text"],
+                width=meta.get("width", 0),
+                height=meta.get("height", 0),
+                skew_angle=meta.get("skew_angle", 0.0),
+                timings={"cache": elapsed, "total": elapsed},
+                sha256=digest,
+                cached=True,
+                fields=hit["fields"],
+            )
+
+        loop = asyncio.get_running_loop()
+        task = _inflight.get(digest)
+        if task is None or task.get_loop() is not loop:
+            task = loop.create_task(VisionEngine._ocr_and_store(image_bytes, digest, cache, started))
+            _inflight[digest] = task
+            task.add_done_callback(lambda t: _inflight.pop(digest) if _inflight.get(digest) is t else None)
+        return await asyncio.shield(task)
+
+    @staticmethod
+    async def _run_ocr(image_bytes: bytes, started: float) -> OcrResult:
+        require_ocr()
+        async with _get_semaphore():
+            queued = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            pool = get_pool()
+            try:
+                result = await loop.run_in_executor(pool, _ocr_pipeline, image_bytes)
+            except BrokenProcessPool:
+                # Retried once on a fresh pool; an image that crashes it again fails the request
+                _discard_pool(pool)
+                result = await loop.run_in_executor(get_pool(), _ocr_pipeline, image_bytes)
+
+        timings = dict(result.timings)
+        timings["queue"] = round((queued - started) * 1000, 2)
+        timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+        return replace(result, timings=timings)
+
+    @staticmethod
+    async def _ocr_and_store(image_bytes: bytes, digest: str, cache, started: float) -> OcrResult:
+        result = replace(await VisionEngine._run_ocr(image_bytes, started), sha256=digest)
+        meta = {"width": result.width, "height": result.height, "skew_angle": result.skew_angle}
+        try:
+            await asyncio.to_thread(cache.put, digest, result.text, None, meta)
+        except sqlite3.Error:
+            pass  # a full or locked cache must not fail an OCR that already succeeded
+        return result
+
+    @staticmethod
+    async def analyze_many(images: list) -> list:
+        """
+        analyze() for many scans; they are processed in parallel up to the pool size.
         """
-        # Placeholder logic
-        # try:
-        #     image = Image.open(image_path)
-        #     text = pytesseract.image_to_string(image, lang='tur')
-        #     return text
-        # except Exception as e:
-        #     return f"OCR Error: {str(e)}"
-        
-        return "OCR Modülü henüz aktif değil (Tesseract kurulumu bekleniyor). Ancak sistem görüntü işleme altyapısına hazır."
+        return list(await asyncio.gather(*(VisionEngine.analyze(data) for data in images)))
@@ -1,10 +1,36 @@
 
 import sqlite3
 import os
+import sys
+import csv
+import json
+import time
 from datetime import datetime
 
+from app.migrations import analyze, migrate, schema_version
+
 # Veritabanı dosya adı
-DB_NAME = "mimar_memory.db"
+DB_NAME = os.getenv("MIMAR_DB_PATH", "mimar_memory.db")
+
+# Toplu aktarım (import/export) için izin verilen tablolar ve kolonlar.
+# Tablo/kolon adları SQL'e doğrudan yazıldığından yalnızca bu listedekiler kabul edilir.
+TABLE_COLUMNS = {
+    "Contacts": ["id", "full_name", "phone", "email", "role", "notes", "created_at"],
+    "Lands": ["id", "owner_id", "city", "district", "neighborhood", "ada", "parsel",
+              "tapu_area_m2", "status", "map_image_path"],
+    "ZoningMemory": ["id", "district", "neighborhood", "zone_type", "emsal_katsayisi", "taks_orani",
+                     "max_height", "plan_note_ref", "last_updated"],
+    "Feasibilities": ["id", "land_id", "scenario_name", "input_emsal", "calculated_total_insaat_m2",
+                      "estimated_cost_total", "contractor_profit_prediction", "is_1_3_rule_compliant",
+                      "created_at", "input_hash", "report_json"],
+    # Parsel sınır kutuları (id = Lands.id)
+    "LandsRTree": ["id", "min_x", "max_x", "min_y", "max_y"],
+}
+
+BULK_BATCH_SIZE = 50000
+# Bu boyuttan büyük dosyalarda (veya tablo boşsa) indeksler yükleme sonunda bir kez kurulur;
+# küçük aktarımlar mevcut indekslere doğrudan yazar (dolu tabloda tüm indeksleri yeniden kurmak pahalı)
+BULK_DEFER_INDEX_BYTES = 8 * 1024 * 1024
 
 def create_connection():
     """SQLite veritabanına bağlantı oluşturur."""
@@ -19,83 +45,16 @@ def create_connection():
         return None
 
 def create_tables(conn):
-    """Tabloları oluşturur."""
-    cursor = conn.cursor()
-
-    # 1. TABLO: Contacts (Paydaşlar)
-    # Müşteri, arsa sahibi ve müteahhitleri tutar.
-    create_contacts_sq = """
-    CREATE TABLE IF NOT EXISTS Contacts (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        full_name TEXT NOT NULL,
-        phone TEXT,
-        email TEXT,
-        role TEXT CHECK(role IN ('Arsa Sahibi', 'Müteahhit', 'Yatırımcı', 'Emlakçı')),
-        notes TEXT,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-    """
-
-    # 2. TABLO: Lands (Arsa Envanteri)
-    # Proje geliştirilecek arsaların tapu verilerini tutar.
-    create_lands_sql = """
-    CREATE TABLE IF NOT EXISTS Lands (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        owner_id INTEGER,
-        city TEXT DEFAULT 'Çanakkale',
-        district TEXT,
-        neighborhood TEXT,
-        ada TEXT,
-        parsel TEXT,
-        tapu_area_m2 REAL NOT NULL,
-        status TEXT,
-        map_image_path TEXT,
-        FOREIGN KEY (owner_id) REFERENCES Contacts (id) ON DELETE SET NULL
-    );
-    """
-
-    # 3. TABLO: ZoningMemory (Öğrenen İmar Kütüphanesi)
-    # Bölgesel imar kuralları hafızası.
-    create_zoning_memory_sql = """
-    CREATE TABLE IF NOT EXISTS ZoningMemory (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        district TEXT,
-        neighborhood TEXT,
-        zone_type TEXT,
-        emsal_katsayisi REAL,
-        taks_orani REAL,
-        max_height TEXT,
-        plan_note_ref TEXT,
-        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-    );
-    """
-
-    # 4. TABLO: Feasibilities (Fizibilite ve Hesaplamalar)
-    # Arsa için yapılan mimari ve finansal hesaplama senaryoları.
-    create_feasibilities_sql = """
-    CREATE TABLE IF NOT EXISTS Feasibilities (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        land_id INTEGER,
-        scenario_name TEXT,
-        input_emsal REAL,
-        calculated_total_insaat_m2 REAL,
-        estimated_cost_total REAL,
-        contractor_profit_prediction REAL,
-        is_1_3_rule_compliant BOOLEAN,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (land_id) REFERENCES Lands (id) ON DELETE CASCADE
-    );
-    """
-
+    """Şemayı son sürüme getirir (app/migrations.py; mevcut veriler korunur)."""
     try:
-        cursor.execute(create_contacts_sq)
-        cursor.execute(create_lands_sql)
-        cursor.execute(create_zoning_memory_sql)
-        cursor.execute(create_feasibilities_sql)
-        conn.commit()
-        print("[BASARILI] Tablolar oluşturuldu (Contacts, Lands, ZoningMemory, Feasibilities).")
+        before = schema_version(conn)
+        applied = migrate(conn)
+        if applied:
+            print(f"[BASARILI] Şema v{before} -> v{schema_version(conn)} güncellendi ({applied} adım, ANALYZE yapıldı).")
+        else:
+            print(f"[BILGI] Şema güncel (v{before}).")
     except sqlite3.Error as e:
-        print(f"[HATA] Tablo oluşturma hatası: {e}")
+        print(f"[HATA] Şema güncelleme hatası: {e}")
 
 def insert_dummy_data(conn):
     """Test için örnek veriler ekler."""
@@ -143,9 +102,146 @@ def insert_dummy_data(conn):
     conn.commit()
     print("[BASARILI] Örnek veriler eklendi.")
 
-def main():
-    # Veritabanı dosyasını sıfırdan oluşturmak için varsa silelim (Temiz Başlangıç)
-    if os.path.exists(DB_NAME):
+def _check_table(table):
+    if table not in TABLE_COLUMNS:
+        raise ValueError(f"Bilinmeyen tablo: {table}. Geçerli tablolar: {', '.join(TABLE_COLUMNS)}")
+
+
+def _detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    return "jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def _read_rows(path, fmt):
+    """CSV veya JSONL dosyasını satır satır (dict) okur; dosya belleğe alınmaz."""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if fmt == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(f):
+                # CSV'de boş hücre NULL demektir
+                yield {key: (value if value != "" else None) for key, value in row.items()}
+
+
+def _table_indexes(conn, table):
+    """Tablonun kullanıcı tanımlı indeksleri: [(ad, CREATE INDEX sql), ...]"""
+    return conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)
+    ).fetchall()
+
+
+def _is_empty(conn):
+    """Bilinen tabloların hiçbirinde satır yoksa True (yeni / --reset ile oluşturulmuş veritabanı)."""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return not any(
+        conn.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0]
+        for table in TABLE_COLUMNS if table in existing
+    )
+
+
+def bulk_import(conn, table, path, fmt=None, batch_size=BULK_BATCH_SIZE):
+    """
+    CSV/JSONL dosyasını tabloya toplu aktarır.
+
+    - Tek transaction, executemany ile batch_size'lık parçalar (dosya akış halinde okunur)
+    - Kolonlar satır satır belirlenir: JSONL'de sonradan görünen anahtarlar da yazılır,
+      satırda olmayan kolonlar tablo varsayılanını alır
+    - Tablo boşsa veya dosya BULK_DEFER_INDEX_BYTES'tan büyükse indeksler yükleme öncesi
+      düşürülür ve sonunda tek seferde yeniden kurulur; aksi halde yerinde kalır
+    - Boş veritabanında PRAGMA synchronous=OFF; dolu (canlı) veritabanında WAL + NORMAL,
+      böylece elektrik kesintisi mevcut veriyi bozamaz. Hata olursa hiçbir satır yazılmaz.
+    Dönüş: aktarılan satır sayısı.
+    """
+    _check_table(table)
+    fmt = _detect_format(path, fmt)
+    allowed = TABLE_COLUMNS[table]
+    ignored = set()
+
+    def groups():
+        # (kolonlar, satırlar): aynı kolon kümesine sahip ardışık satırlar, en fazla batch_size
+        columns, batch = None, []
+        for row in _read_rows(path, fmt):
+            ignored.update(key for key in row if key not in allowed)
+            row_columns = tuple(c for c in allowed if c in row)
+            if not row_columns:
+                raise ValueError(f"'{path}' içinde {table} tablosuna ait kolon içermeyen satır var.")
+            if batch and (row_columns != columns or len(batch) >= batch_size):
+                yield columns, batch
+                batch = []
+            columns = row_columns
+            batch.append(tuple(row[c] for c in columns))
+        if batch:
+            yield columns, batch
+
+    old_sync = conn.execute("PRAGMA synchronous").fetchone()[0]
+    if _is_empty(conn):
+        conn.execute("PRAGMA synchronous = OFF")
+    else:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -200000")  # ~200 MB sayfa önbelleği
+
+    table_empty = not conn.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0]
+    defer_indexes = table_empty or os.path.getsize(path) >= BULK_DEFER_INDEX_BYTES
+    indexes = _table_indexes(conn, table) if defer_indexes else []
+    count = 0
+    try:
+        conn.execute("BEGIN")
+        for name, _ in indexes:
+            conn.execute(f'DROP INDEX "{name}"')
+        for columns, batch in groups():
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", batch
+            )
+            count += len(batch)
+        for _, sql in indexes:
+            conn.execute(sql)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute(f"PRAGMA synchronous = {old_sync}")
+    if ignored:
+        print(f"[BILGI] Tanınmayan kolonlar atlandı: {', '.join(sorted(map(str, ignored)))}")
+    return count
+
+
+def export_table(conn, table, out, fmt="csv", batch_size=BULK_BATCH_SIZE):
+    """
+    Tabloyu CSV/JSONL olarak akış halinde yazar (fetchmany; tablo belleğe alınmaz).
+    Dönüş: yazılan satır sayısı.
+    """
+    _check_table(table)
+    columns = TABLE_COLUMNS[table]
+    cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+
+    writer = csv.writer(out) if fmt == "csv" else None
+    if writer:
+        writer.writerow(columns)
+
+    count = 0
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        if writer:
+            writer.writerows(batch)
+        else:
+            out.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in batch)
+        count += len(batch)
+    return count
+
+
+def main(reset=False):
+    # --reset: veritabanını silip sıfırdan oluşturur (Temiz Başlangıç); aksi halde
+    # mevcut veritabanı yerinde güncellenir, canlı veritabanında da çalıştırılabilir.
+    if reset and os.path.exists(DB_NAME):
         os.remove(DB_NAME)
         print(f"[BILGI] Eski '{DB_NAME}' dosyası silindi.")
     
@@ -153,21 +249,89 @@ def main():
     
     if conn is not None:
         create_tables(conn)
-        insert_dummy_data(conn)
+
+        # Örnek veriler yalnızca boş veritabanına eklenir
+        cursor = conn.cursor()
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM Contacts)")
+        if cursor.fetchone()[0]:
+            print("[BILGI] Veritabanı dolu, örnek veriler eklenmedi.")
+        else:
+            insert_dummy_data(conn)
         
         # Doğrulama Sorgusu
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM Contacts")
-        print(f"\n[TEST] Kayıtlı Kişi Sayısı: {len(cursor.fetchall())}")
+        cursor.execute("SELECT COUNT(*) FROM Contacts")
+        print(f"\n[TEST] Kayıtlı Kişi Sayısı: {cursor.fetchone()[0]}")
         
-        cursor.execute("SELECT * FROM Lands")
+        cursor.execute("SELECT * FROM Lands ORDER BY id LIMIT 1")
         land = cursor.fetchone()
-        print(f"[TEST] Kayıtlı Arsa: {land[3]}/{land[4]} - Ada: {land[5]} Parsel: {land[6]}")
+        if land:
+            print(f"[TEST] Kayıtlı Arsa: {land[3]}/{land[4]} - Ada: {land[5]} Parsel: {land[6]}")
         
         conn.close()
         print(f"\n[BASARILI] Tüm işlemler tamamlandı. '{DB_NAME}' kullanıma hazır.")
     else:
         print("[HATA] Veritabanı bağlantısı kurulamadı.")
 
+def cli(argv=None):
+    """
+    python init_db.py                         -> şemayı günceller, boşsa örnek verileri ekler (varsayılan)
+    python init_db.py init --reset            -> veritabanını silip sıfırdan oluşturur
+    python init_db.py migrate                 -> yalnızca şema geçişleri + ANALYZE
+    python init_db.py import Lands lands.csv  -> CSV/JSONL toplu aktarım
+    python init_db.py export Lands [out.jsonl] -> CSV/JSONL dışa aktarım (dosya yoksa stdout)
+    """
+    import argparse
+    global DB_NAME
+
+    parser = argparse.ArgumentParser(description="Mimar hafıza veritabanı araçları")
+    parser.add_argument("--db", default=DB_NAME, help=f"Veritabanı dosyası (varsayılan: {DB_NAME})")
+    sub = parser.add_subparsers(dest="command")
+
+    p_init = sub.add_parser("init", help="Şemayı günceller, boş veritabanına örnek veri ekler")
+    p_init.add_argument("--reset", action="store_true", help="Mevcut veritabanını silip sıfırdan oluşturur")
+
+    sub.add_parser("migrate", help="Şema geçişlerini uygular ve ANALYZE çalıştırır")
+
+    p_import = sub.add_parser("import", help="CSV/JSONL dosyasından toplu aktarım")
+    p_import.add_argument("table", choices=list(TABLE_COLUMNS))
+    p_import.add_argument("path")
+    p_import.add_argument("--format", choices=["csv", "jsonl"])
+    p_import.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE)
+
+    p_export = sub.add_parser("export", help="Tabloyu CSV/JSONL olarak dışa aktarır")
+    p_export.add_argument("table", choices=list(TABLE_COLUMNS))
+    p_export.add_argument("path", nargs="?", default="-")
+    p_export.add_argument("--format", choices=["csv", "jsonl"])
+
+    args = parser.parse_args(argv)
+    DB_NAME = args.db
+
+    if args.command in (None, "init"):
+        main(reset=getattr(args, "reset", False))
+        return
+
+    conn = sqlite3.connect(DB_NAME)
+    try:
+        if args.command == "migrate":
+            create_tables(conn)
+            analyze(conn)
+        elif args.command == "import":
+            create_tables(conn)
+            started = time.perf_counter()
+            count = bulk_import(conn, args.table, args.path, args.format, args.batch_size)
+            # Büyük yüklemeden sonra planlayıcı istatistikleri tazelenir
+            analyze(conn)
+            print(f"[BASARILI] {count} satır {args.table} tablosuna aktarıldı ({time.perf_counter() - started:.2f} sn).")
+        else:
+            fmt = _detect_format(args.path, args.format)
+            if args.path == "-":
+                count = export_table(conn, args.table, sys.stdout, fmt)
+            else:
+                with open(args.path, "w", encoding="utf-8", newline="") as out:
+                    count = export_table(conn, args.table, out, fmt)
+            print(f"[BASARILI] {args.table} tablosundan {count} satır dışa aktarıldı.", file=sys.stderr)
+    finally:
+        conn.close()
+
 if __name__ == '__main__':
-    main()
+    cli()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the API package as "app" (same as uvicorn app.main:app run from backend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
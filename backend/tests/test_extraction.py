@@ -0,0 +1,45 @@
+import pytest
+
+from app.extraction import MIN_CONFIDENCE, extract_fields, parse_tr_number
+
+
+def values(text):
+    return {name: f.value for name, f in extract_fields(text).fields.items()}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Ön/Yan/Arka bahçe: 5/3/3", {"on_bahce": 5.0, "yan_bahce": 3.0, "arka_bahce": 3.0}),
+    ("Ada/Parsel: 111/4", {"ada": 111.0, "parsel": 4.0}),
+])
+def test_combined_formats_are_not_reread_by_single_field_rules(text, expected):
+    assert values(text) == expected
+
+
+@pytest.mark.parametrize("text, name, value", [
+    ("KAT ADEDI: 4", "kat_adedi", 4.0),
+    ("YUKSEKLIK: 9.50 m", "hmax", 9.5),
+    ("ON BAHCE MESAFESI: 5", "on_bahce", 5.0),
+    ("YÜZÖLÇÜMÜ: 1.250,50 m2", "arsa_m2", 1250.5),
+    ("yuzolcumu: 1.250,50 m2", "arsa_m2", 1250.5),
+])
+def test_uppercase_and_diacritic_free_labels(text, name, value):
+    fields = extract_fields(text).fields
+    assert fields[name].value == value
+    assert fields[name].confidence >= MIN_CONFIDENCE
+
+
+def test_imar_durumu_payload():
+    result = extract_fields("İMAR DURUMU\nEMSAL: 1,50\nTAKS: %40\nKAT ADEDİ: 5\nTAPU ALANI: 540,50 m²")
+    assert result.to_payload() == {"arsa_m2": 540.5, "emsal": 1.5, "kat_adedi": 5}
+    assert result.value("taks") == pytest.approx(0.4)
+
+
+@pytest.mark.parametrize("raw, thousands, expected", [
+    ("1.250,50", True, 1250.5),
+    ("1,50", True, 1.5),
+    ("0.30", True, 0.3),
+    ("1.500", True, 1500.0),
+    ("1.500", False, 1.5),
+])
+def test_parse_tr_number(raw, thousands, expected):
+    assert parse_tr_number(raw, thousands) == expected